@@ -1,16 +1,91 @@
 # arxiv_2_pdf.py
 import os
 import re
+import json
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
-def arxiv_2_pdf(pdf_url: str, title: str):
+# Downloader settings
+DOWNLOAD_DIR = os.path.join("downloads", "arxiv_dl")
+CHUNK_SIZE = 1024 * 1024    # Bytes per read/write (1 MiB)
+
+# Shared session so repeated downloads reuse connections to arxiv.org
+_session = requests.Session()
+
+# One lock per target file, so two queued downloads of the same paper can't share a temp file
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+def _path_lock(filepath: str) -> threading.Lock:
+    with _path_locks_guard:
+        return _path_locks.setdefault(filepath, threading.Lock())
+
+def _meta_path(filepath: str) -> str:
+    # Hidden sidecar holding the ETag/size the file was downloaded with
+    directory, filename = os.path.split(filepath)
+    return os.path.join(directory, f".{filename}.json")
+
+def _read_meta(path: str) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_meta(path: str, meta: dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+def _content_range_total(content_range: str | None) -> int | None:
+    """
+    Returns the full size from a Content-Range header ('bytes */1234' or 'bytes 0-99/1234'), or None if unknown.
+    """
+    match = re.fullmatch(r"bytes [^/]+/(\d+)", (content_range or '').strip())
+    return int(match.group(1)) if match else None
+
+def _is_up_to_date(session: requests.Session, pdf_url: str, filepath: str) -> bool:
+    """
+    Returns True if a finished download still matches the server's copy (same ETag or same size).
+    Files are only ever renamed into place once complete, so an unverifiable file is kept as is.
+    """
+    try:
+        head = session.head(pdf_url, allow_redirects=True, timeout=30)
+        head.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Could not check '{filepath}' against the server ({e}), keeping the existing file.")
+        return True
+
+    meta = _read_meta(_meta_path(filepath))
+    etag = head.headers.get('ETag')
+    length = head.headers.get('Content-Length')
+    if etag and meta.get('etag'):
+        return etag == meta['etag']
+    if length is not None:
+        return int(length) == os.path.getsize(filepath)
+    return True
+
+def arxiv_2_pdf(pdf_url: str, title: str, download_dir: str = DOWNLOAD_DIR, chunk_size: int = CHUNK_SIZE,
+                session: requests.Session | None = None) -> str | None:
     """
     Downloads a PDF from a given URL and saves it with the specified title.
 
+    The file is written to '<name>.pdf.part' and renamed into place once complete, so an interrupted
+    download never leaves a corrupt PDF. A later call resumes the partial file with an HTTP Range
+    request, and a file that was already downloaded is skipped if its ETag or size still matches.
+
     Args:
         pdf_url (str): the URL of the PDF to download.
         title (str): the title of the paper, used for the filename.
+        download_dir (str): the directory the PDF is saved in.
+        chunk_size (int): bytes read and written at a time.
+        session (requests.Session | None): session to download with (default: a shared keep-alive session).
+
+    Returns:
+        str | None: the path of the saved file, or None if the download failed.
     """
+    session = session or _session
 
     try:
         # Sanitize the title to create a valid filename
@@ -18,10 +93,10 @@ def arxiv_2_pdf(pdf_url: str, title: str):
         safe_title = re.sub(r'[<>:"/\\|?*]', '', title).replace(' ', '_')
         filename = f"{safe_title}.pdf"
 
-        # Define the downloads directory and create it if it doesn't exist
-        download_dir = os.path.join("downloads", "arxiv_dl")
+        # Create the downloads directory if it doesn't exist
         os.makedirs(download_dir, exist_ok=True)
         filepath = os.path.join(download_dir, filename)
+        part_path = f"{filepath}.part"
         
         """ 
         ### To save directly to ~home downloads folder
@@ -36,26 +111,254 @@ def arxiv_2_pdf(pdf_url: str, title: str):
         download_dir = os.path.join(project_root, "downloads", "arxiv_dl")
         """
 
-        print(f"Downloading {filename}...\n")
+        with _path_lock(filepath):
+            # Skip papers that were already downloaded
+            if os.path.exists(filepath) and _is_up_to_date(session, pdf_url, filepath):
+                print(f"Already downloaded: {filepath}\n")
+                return filepath
+
+            # Resume a partial download, as long as the server still has the same file (If-Range)
+            part_meta = _read_meta(_meta_path(part_path))
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {}
+            if offset and part_meta.get('etag'):
+                headers = {'Range': f"bytes={offset}-", 'If-Range': part_meta['etag']}
+                print(f"Resuming {filename} from {offset} bytes...\n")
+            else:
+                offset = 0
+                print(f"Downloading {filename}...\n")
+
+            # Make the request to the URL
+            response = session.get(pdf_url, headers=headers, stream=True, timeout=60)
+
+            # 416: nothing left past the offset, e.g. a run stopped between the last write and the rename
+            complete = False
+            if response.status_code == 416 and offset:
+                response.close()
+                if _content_range_total(response.headers.get('Content-Range')) == offset:
+                    complete = True
+                else:
+                    print(f"Partial file for {filename} doesn't match the server's copy, restarting the download...\n")
+                    offset = 0
+                    response = session.get(pdf_url, stream=True, timeout=60)
+
+            if complete:
+                etag = part_meta.get('etag')
+                expected_size = offset
+            else:
+                with response:
+                    response.raise_for_status() # This raises error for bad responses (4xx or 5xx)
 
-        # Make the request to the URL
-        response = requests.get(pdf_url, stream=True)
-        response.raise_for_status() # This raises error for bad responses (4xx or 5xx)
+                    # 206 continues the partial file, 200 means the server sent the whole file again
+                    if response.status_code != 206:
+                        offset = 0
+                    etag = response.headers.get('ETag') or part_meta.get('etag')
+                    length = response.headers.get('Content-Length')
+                    # (Content-Length is the compressed size if the server encoded the body)
+                    encoded = response.headers.get('Content-Encoding') not in (None, 'identity')
+                    expected_size = offset + int(length) if length is not None and not encoded else None
+                    if etag:
+                        _write_meta(_meta_path(part_path), {'etag': etag, 'url': pdf_url})
 
-        # Write the content to the file in chunks
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+                    # Write the content to the temp file in chunks
+                    with open(part_path, 'ab' if offset else 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+
+            size = os.path.getsize(part_path)
+            if expected_size is not None and size != expected_size:
+                print(f"Error downloading PDF: got {size} of {expected_size} bytes, will resume on the next run.")
+                return None
+
+            # Complete: move into place atomically and remember what was downloaded
+            os.replace(part_path, filepath)
+            _write_meta(_meta_path(filepath), {'etag': etag, 'size': size, 'url': pdf_url})
+            if os.path.exists(_meta_path(part_path)):
+                os.remove(_meta_path(part_path))
 
         print(f"Successfully saved to {filepath}\n")
+        return filepath
     
     except requests.exceptions.RequestException as e:
         print(f"Error downloading PDF: {e}")
     except IOError as e:
         print(f"Error saving PDF: {e}")
+    return None
+
+class DownloadQueue:
+    """
+    Downloads PDFs on a small background thread pool, so the report loop (and summarization)
+    keeps going while files arrive. Call wait() at the end for a progress summary.
+    """
+    def __init__(self, workers: int = 3, download=arxiv_2_pdf):
+        """
+        Args:
+            workers (int): Maximum number of downloads in flight.
+            download (callable): Called as download(pdf_url, title), returns the saved path or None.
+        """
+        self.download = download
+        self.saved = []     # (title, path)
+        self.failed = []    # title
+        self.started_at = time.monotonic()
+        self._futures = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+
+    def submit(self, pdf_url: str, title: str):
+        """
+        Queues one PDF for download.
+        """
+        self._futures.append(self._executor.submit(self._run, pdf_url, title))
+
+    def _run(self, pdf_url: str, title: str):
+        try:
+            path = self.download(pdf_url, title)
+        except Exception as e:
+            print(f"Error downloading '{title}': {e}")
+            path = None
+        with self._lock:
+            if path:
+                self.saved.append((title, path))
+            else:
+                self.failed.append(title)
+
+    def pending(self) -> int:
+        """
+        Returns the number of queued or running downloads.
+        """
+        return sum(not future.done() for future in self._futures)
+
+    def wait(self) -> dict:
+        """
+        Blocks until every queued download has finished and returns a summary.
+        """
+        pending = self.pending()
+        if pending:
+            print(f"Waiting for {pending} PDF download(s) to finish...\n")
+        self._executor.shutdown(wait=True)
+
+        total_bytes = 0
+        for _, path in self.saved:
+            try:
+                total_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        return {
+            'queued': len(self._futures),
+            'saved': len(self.saved),
+            'failed': len(self.failed),
+            'megabytes': round(total_bytes / (1024 * 1024), 1),
+            'seconds': round(time.monotonic() - self.started_at, 1),
+        }
+
+def _self_check():
+    """
+    Runs the download paths against a local HTTP server that supports Range/If-Range and answers
+    416 past the end (no arXiv requests).
+    """
+    import tempfile
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    served = {'body': b"%PDF-1.4 " + bytes(range(256)) * 40, 'etag': '"v1"', 'requests': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, head_only: bool):
+            body, etag = served['body'], served['etag']
+            range_header = self.headers.get('Range')
+            served['requests'].append(range_header)
+            start = 0
+            if range_header and self.headers.get('If-Range') in (None, etag):
+                start = int(range_header.split('=')[1].split('-')[0])
+                if start >= len(body):
+                    self.send_response(416)
+                    self.send_header('Content-Range', f"bytes */{len(body)}")
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header('Content-Range', f"bytes {start}-{len(body) - 1}/{len(body)}")
+            else:
+                self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body) - start))
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(body[start:])
+
+        def do_GET(self):
+            self._send(head_only=False)
+
+        def do_HEAD(self):
+            self._send(head_only=True)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/paper.pdf"
+    body = served['body']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "Test_Paper.pdf")
+        part_path = f"{path}.part"
+
+        # 1. Fresh download
+        assert arxiv_2_pdf(url, "Test Paper", tmp) == path
+        assert open(path, 'rb').read() == body
+
+        # 2. Already downloaded and unchanged: skipped (HEAD only)
+        served['requests'].clear()
+        assert arxiv_2_pdf(url, "Test Paper", tmp) == path
+        assert served['requests'] == [None]
+
+        # 3. Resume a partial download from its offset
+        os.remove(path)
+        with open(part_path, 'wb') as f:
+            f.write(body[:1000])
+        _write_meta(_meta_path(part_path), {'etag': served['etag'], 'url': url})
+        served['requests'].clear()
+        assert arxiv_2_pdf(url, "Test Paper", tmp) == path
+        assert served['requests'] == ["bytes=1000-"] and open(path, 'rb').read() == body
+
+        # 4. Partial file already complete (stopped before the rename): server answers 416, file is finished
+        os.remove(path)
+        with open(part_path, 'wb') as f:
+            f.write(body)
+        _write_meta(_meta_path(part_path), {'etag': served['etag'], 'url': url})
+        assert arxiv_2_pdf(url, "Test Paper", tmp) == path
+        assert open(path, 'rb').read() == body and not os.path.exists(part_path)
+
+        # 5. Partial file longer than the server's copy: 416, restarted from zero
+        os.remove(path)
+        with open(part_path, 'wb') as f:
+            f.write(body + b"junk")
+        _write_meta(_meta_path(part_path), {'etag': served['etag'], 'url': url})
+        assert arxiv_2_pdf(url, "Test Paper", tmp) == path
+        assert open(path, 'rb').read() == body
+
+        # 6. Server copy changed (new ETag): the stale partial file is replaced, not appended to
+        os.remove(path)
+        with open(part_path, 'wb') as f:
+            f.write(body[:1000])
+        _write_meta(_meta_path(part_path), {'etag': served['etag'], 'url': url})
+        served['body'], served['etag'] = b"%PDF-1.5 new version", '"v2"'
+        assert arxiv_2_pdf(url, "Test Paper", tmp) == path
+        assert open(path, 'rb').read() == served['body']
+
+    server.shutdown()
+    server.server_close()
+    print("arxiv_2_pdf: fresh, skipped, resumed, 416-finished, 416-restarted and changed-ETag downloads all correct.")
 
 # Test Block
 if __name__ == "__main__":
+    import sys
+
+    # Offline check against a local server instead of the live download below
+    if '--self-check' in sys.argv:
+        _self_check()
+        sys.exit()
+
     # test URL for a little known paper (Attention is All You Need)
     test_url = "https://arxiv.org/pdf/1706.03762.pdf"
     test_title = "Attention Is All You Need"
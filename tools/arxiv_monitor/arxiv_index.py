@@ -0,0 +1,245 @@
+# arxiv_index.py
+# This module keeps a local full-text search index (SQLite FTS5) over harvested papers and their summaries
+
+# Run CLI with one of the terminal prompts below
+# python tools/arxiv_monitor/arxiv_index.py ingest [--records FILE]
+# python tools/arxiv_monitor/arxiv_index.py search "QUERY" [-n NUMBER_RESULTS]
+
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from arxiv_records import RECORDS_PATH
+
+# Default index location
+INDEX_PATH = os.path.join("downloads", "arxiv_cache", "arxiv_index.sqlite")
+
+# Relative column weights for ranking (title, abstract, summary, authors)
+RANK_WEIGHTS = (10.0, 1.0, 2.0, 0.5)
+
+# Bumped (PRAGMA user_version) when the table layout changes; older index files are migrated on open
+SCHEMA_VERSION = 1
+
+# Paper columns other than the row key
+PAPER_COLUMNS = ('id', 'version_id', 'title', 'authors', 'published', 'categories', 'pdf_url', 'abstract', 'summary',
+                 'queries', 'indexed_at')
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS papers (
+        doc_id INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        version_id TEXT,
+        title TEXT,
+        authors TEXT,
+        published TEXT,
+        categories TEXT,
+        pdf_url TEXT,
+        abstract TEXT,
+        summary TEXT,
+        queries TEXT,
+        indexed_at REAL
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+        title, abstract, summary, authors,
+        content='papers', content_rowid='doc_id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+        INSERT INTO papers_fts(rowid, title, abstract, summary, authors)
+        VALUES (new.doc_id, new.title, new.abstract, new.summary, new.authors);
+    END;
+    CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+        INSERT INTO papers_fts(papers_fts, rowid, title, abstract, summary, authors)
+        VALUES ('delete', old.doc_id, old.title, old.abstract, old.summary, old.authors);
+    END;
+    CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+        INSERT INTO papers_fts(papers_fts, rowid, title, abstract, summary, authors)
+        VALUES ('delete', old.doc_id, old.title, old.abstract, old.summary, old.authors);
+        INSERT INTO papers_fts(rowid, title, abstract, summary, authors)
+        VALUES (new.doc_id, new.title, new.abstract, new.summary, new.authors);
+    END;
+"""
+
+class PaperIndex:
+    """
+    Full-text index over papers, stored in one SQLite file.
+
+    'papers' holds one row per paper (keyed by the arXiv id without version, so a new version replaces
+    the old one) and 'papers_fts' is an FTS5 index over its title, abstract, summary and authors,
+    kept in sync by triggers. Searches are ranked with BM25.
+
+    The index is tied to papers through an explicit INTEGER PRIMARY KEY (doc_id); the implicit rowid of
+    a table keyed by TEXT may be renumbered by VACUUM, which would silently desync the index.
+    """
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._migrate()
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _migrate(self):
+        """
+        Moves an index file created before SCHEMA_VERSION 1 (FTS keyed by the implicit rowid) to the
+        current layout, copying the papers and rebuilding the FTS index through the insert trigger.
+        """
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(papers)")]
+        if version >= SCHEMA_VERSION or not columns or 'doc_id' in columns:
+            return
+        print(f"Upgrading the paper index '{self.path}' to schema version {SCHEMA_VERSION}...")
+        column_list = ", ".join(PAPER_COLUMNS)
+        # One script in one transaction, so an interrupted upgrade leaves the old layout intact
+        self._conn.executescript(f"""
+            BEGIN;
+            DROP TRIGGER IF EXISTS papers_ai;
+            DROP TRIGGER IF EXISTS papers_ad;
+            DROP TRIGGER IF EXISTS papers_au;
+            DROP TABLE IF EXISTS papers_fts;
+            ALTER TABLE papers RENAME TO papers_old;
+            {SCHEMA}
+            INSERT INTO papers ({column_list}) SELECT {column_list} FROM papers_old;
+            DROP TABLE papers_old;
+            COMMIT;
+        """)
+
+    def add_record(self, record: dict, commit: bool = True):
+        """
+        Adds or updates one paper from a structured record (see arxiv_records.paper_record).
+        Queries that matched the paper in earlier runs are kept.
+        """
+        paper_id = re.sub(r'v\d+$', '', record['id'])
+        with self._lock:
+            row = self._conn.execute("SELECT queries FROM papers WHERE id = ?", (paper_id,)).fetchone()
+            queries = json.loads(row[0]) if row and row[0] else []
+            queries += [q for q in record.get('queries', []) if q not in queries]
+            self._conn.execute("""
+                INSERT INTO papers (id, version_id, title, authors, published, categories, pdf_url, abstract, summary,
+                                    queries, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    version_id = excluded.version_id, title = excluded.title, authors = excluded.authors,
+                    published = excluded.published, categories = excluded.categories, pdf_url = excluded.pdf_url,
+                    abstract = excluded.abstract, summary = excluded.summary, queries = excluded.queries,
+                    indexed_at = excluded.indexed_at
+            """, (paper_id, record['id'], record.get('title'), ", ".join(record.get('authors', [])),
+                  record.get('published'), " ".join(record.get('categories', [])), record.get('pdf_url'),
+                  record.get('abstract'), record.get('summary'), json.dumps(queries), time.time()))
+            if commit:
+                self._conn.commit()
+
+    def ingest_jsonl(self, path: str = RECORDS_PATH) -> int:
+        """
+        Adds every record in a JSONL records file (later lines win for the same paper).
+
+        Returns:
+            int: The number of records read.
+        """
+        count = 0
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.add_record(record, commit=False)
+                count += 1
+        with self._lock:
+            self._conn.commit()
+        return count
+
+    def search(self, query: str, limit: int = 10, raw: bool = False) -> list[dict]:
+        """
+        Returns the best matching papers, most relevant first.
+
+        Args:
+            query (str): Keywords (all must match); with raw=True, an FTS5 query (e.g. 'title:diffusion OR "graph neural"').
+            limit (int): Maximum number of results.
+            raw (bool): Pass the query to FTS5 as is instead of quoting each keyword.
+
+        Returns:
+            list[dict]: id, title, published, pdf_url, queries and a highlighted snippet for each match.
+        """
+        if not raw:
+            # Quote each keyword so characters like '-' or ':' aren't read as FTS5 syntax
+            query = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT p.id, p.title, p.published, p.pdf_url, p.queries,
+                       snippet(papers_fts, -1, '[', ']', '...', 16) AS snippet
+                FROM papers_fts JOIN papers p ON p.doc_id = papers_fts.rowid
+                WHERE papers_fts MATCH ?
+                ORDER BY bm25(papers_fts, {', '.join(str(weight) for weight in RANK_WEIGHTS)})
+                LIMIT ?
+            """, (query, limit)).fetchall()
+        return [{'id': row[0], 'title': row[1], 'published': row[2], 'pdf_url': row[3],
+                 'queries': json.loads(row[4] or '[]'), 'snippet': row[5]} for row in rows]
+
+    def count(self) -> int:
+        """
+        Returns the number of indexed papers.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def main():
+    """
+    Function to build and search the local paper index via a CLI.
+    """
+    parser = argparse.ArgumentParser(description="Search previously harvested arXiv papers offline.")
+    parser.add_argument("--index", type=str, default=INDEX_PATH, help=f"Index file (default is '{INDEX_PATH}').")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Add the papers from a JSONL records file to the index.")
+    ingest_parser.add_argument("--records", type=str, default=RECORDS_PATH,
+                               help=f"Records file written by arxiv_monitor.py --jsonl (default is '{RECORDS_PATH}').")
+
+    search_parser = subparsers.add_parser("search", help="Ranked keyword search over titles, abstracts and summaries.")
+    search_parser.add_argument("query", type=str, help="Keywords to look for (all must match).")
+    search_parser.add_argument("-n", "--num_results", type=int, default=10, help="Number of results (default is 10).")
+    search_parser.add_argument("--raw", action="store_true", help="Treat the query as FTS5 syntax (OR, NEAR, title:...).")
+
+    args = parser.parse_args()
+    index = PaperIndex(args.index)
+
+    if args.command == "ingest":
+        count = index.ingest_jsonl(args.records)
+        print(f"Ingested {count} record(s) from '{args.records}'. The index now holds {index.count()} papers.\n")
+
+    elif args.command == "search":
+        started = time.perf_counter()
+        try:
+            results = index.search(args.query, args.num_results, raw=args.raw)
+        except sqlite3.OperationalError as e:
+            # Malformed --raw FTS5 queries (unbalanced quotes, unknown columns, stray operators)
+            if not args.raw:
+                raise
+            print(f"\nInvalid query syntax for '{args.query}': {e}\n")
+        else:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"\n{len(results)} result(s) for '{args.query}' ({elapsed_ms:.1f} ms)\n")
+            for i, result in enumerate(results):
+                print(f"--- [ Result {i+1} ] ---")
+                print(f"Title: {result['title']}")
+                print(f"Published: {result['published']}")
+                print(f"Link: {result['pdf_url']}")
+                if result['queries']:
+                    print(f"Matched Queries: {', '.join(result['queries'])}")
+                print(f"{result['snippet']}\n")
+
+    index.close()
+
+if __name__ == "__main__":
+    main()
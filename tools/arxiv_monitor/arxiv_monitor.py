@@ -4,11 +4,36 @@
 import argparse
 import datetime
 import os
-from arxiv_tool import search_arxiv
-from arxiv_summarizer import summarize_text
-from arxiv_2_pdf import arxiv_2_pdf
+import time
+from arxiv_tool import harvest_arxiv
+from arxiv_summarizer import summarize_concurrently, summarize_batch, summary_cache
+from arxiv_2_pdf import DownloadQueue
+from watch_state import WatchState, STATE_PATH
+from arxiv_records import RecordWriter, paper_record, rollup_records, RECORDS_PATH, ROLLUP_PATH
+from arxiv_index import PaperIndex, INDEX_PATH
 from google import genai
 
+# In watch mode, a query seen before pages back to its last reported paper, up to this many results
+WATCH_MAX_RESULTS = 1000
+# ... starting from a page this small (usually only a few papers are new), doubled while every entry is unseen
+WATCH_FIRST_PAGE_SIZE = 50
+
+def update_watch_state(watch_state: WatchState, queries: list[str], papers_list: list, matched_queries: dict,
+                       capped_queries: list[str]):
+    """
+    Moves each query's high-water mark to its newest reported paper and saves the state.
+
+    A query that already had a mark but hit WATCH_MAX_RESULTS without reaching it keeps its old mark,
+    since moving it would silently skip the unreported papers in between.
+    """
+    for q in queries:
+        if q in capped_queries and watch_state.has(q):
+            print(f"Warning: '{q}' has more than {WATCH_MAX_RESULTS} new papers; its watch mark was not moved, "
+                  f"so the next run starts from the same point.\n")
+            continue
+        watch_state.update(q, [paper for paper in papers_list if q in matched_queries[paper.get_short_id()]])
+    watch_state.save()
+
 def main():
     """
     Function to run the arXiv monitor agent via a CLI.
@@ -19,20 +44,76 @@ def main():
     # Setup argument parser
     # Run CLI with terminal prompt below, query is always required (no default)
     # python tools/arxiv_monitor/arxiv_monitor.py -q "QUERY" -n NUMBER_PAPERS -s "SORT_BY" -o "OUTPUT_TYPE"
+    # or, for several topics at once: python tools/arxiv_monitor/arxiv_monitor.py -Q queries.txt ...
     parser = argparse.ArgumentParser(description="An AI-powered tool to search, summarize, and manage arXiv papers.")
-    parser.add_argument("-q", "--query", type=str, required=True, help="Search query for arXiv papers.")
-    parser.add_argument("-n", "--num_papers", type=int, default=3, help="Number of papers to retrieve (default is 3).")
+    query_group = parser.add_mutually_exclusive_group(required=True)
+    query_group.add_argument("-q", "--query", type=str, help="Search query for arXiv papers.")
+    query_group.add_argument("-Q", "--query-file", type=str,
+                             help="File with one search query per line ('#' starts a comment). "
+                                  "Papers matching several queries are only processed once.")
+    parser.add_argument("-n", "--num_papers", type=int, default=3,
+                        help="Number of papers to retrieve per query (default is 3).")
     parser.add_argument("-s", "--sort_by", type=str, choices=["relevance", "updated", "submitted"], default="submitted", 
                         help="Sorting criterion (default is 'submitted')")
     parser.add_argument("-o", "--output", type=str, default=None, help="Optional filename to save the report.")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="Number of abstracts summarized concurrently (default is 4).")
+    parser.add_argument("--rpm", type=int, default=60,
+                        help="Gemini requests per minute quota shared by all workers (default is 60).")
+    parser.add_argument("-b", "--batch", action="store_true",
+                        help="Pack several abstracts into each Gemini request (fewer requests for large digests).")
+    parser.add_argument("-d", "--download", type=str, choices=["all", "none", "select"], default="select",
+                        help="Download every PDF, none, or ask per paper (default is 'select'). "
+                             "Downloads run in the background while the report continues.")
+    parser.add_argument("--download-workers", type=int, default=3,
+                        help="Number of PDFs downloaded at the same time (default is 3).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't reuse or store summaries in the local summary store.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Only report papers submitted since the last --watch run of this query (for cron jobs). "
+                             "Every new paper is reported; -n only limits the first run of a query.")
+    parser.add_argument("--state", type=str, default=STATE_PATH,
+                        help=f"State file used by --watch (default is '{STATE_PATH}').")
+    parser.add_argument("--jsonl", type=str, nargs="?", const=RECORDS_PATH, default=None, metavar="FILE",
+                        help=f"Also append one structured record per paper to a JSONL file (default is '{RECORDS_PATH}').")
+    parser.add_argument("--parquet", action="store_true",
+                        help=f"After the run, roll the whole JSONL history up into '{ROLLUP_PATH}' (implies --jsonl).")
+    parser.add_argument("--index", type=str, nargs="?", const=INDEX_PATH, default=None, metavar="DB",
+                        help=f"Also add every reported paper to the local search index (default is '{INDEX_PATH}'); "
+                             "search it with arxiv_index.py.")
 
     args = parser.parse_args()
 
     # Use the arguments provided by the user
-    query = args.query
+    if args.query_file:
+        with open(args.query_file, encoding='utf-8') as f:
+            queries = [line.split('#', 1)[0].strip() for line in f]
+        queries = list(dict.fromkeys(q for q in queries if q))
+        if not queries:
+            parser.error(f"no queries found in '{args.query_file}'")
+        query = os.path.splitext(os.path.basename(args.query_file))[0]     # Used to name the report
+    else:
+        queries = [args.query]
+        query = args.query
     num_papers = args.num_papers
     sort_choice = args.sort_by
     output_filename = args.output
+    summary_cache.enabled = not args.no_cache
+    run_at = datetime.datetime.now(datetime.timezone.utc)
+
+    # Structured records, written per paper next to the text report
+    if args.parquet and not args.jsonl:
+        args.jsonl = RECORDS_PATH
+    records = RecordWriter(args.jsonl) if args.jsonl else None
+    index = PaperIndex(args.index) if args.index else None
+
+    # Watch mode walks the newest submissions first and stops at the last paper already reported
+    watch_state = None
+    if args.watch:
+        watch_state = WatchState(args.state)
+        if sort_choice != "submitted":
+            print(f"--watch needs newest-first results, sorting by 'submitted' instead of '{sort_choice}'.\n")
+            sort_choice = "submitted"
 
     # Define/ create output directory
     output_dir = os.path.join("downloads", "arxiv_dl")
@@ -48,16 +129,35 @@ def main():
     output_filepath = os.path.join(output_dir, output_filename)
 
     # Confirm selections while beginning query        
-    print(f"\nSearching for {num_papers} papers on '{query}', sorted by '{sort_choice}'...\n")
+    if len(queries) == 1:
+        print(f"\nSearching for {num_papers} papers on '{query}', sorted by '{sort_choice}'...\n")
+    else:
+        print(f"\nSearching for {num_papers} papers on each of {len(queries)} queries, sorted by '{sort_choice}'...\n")
     print(f"Results will be saved to {output_filepath}\n")
 
-    # Perform the search
-    papers = search_arxiv(query, max_results = num_papers, sort_by = sort_choice)
-    papers_list = list(papers)  # Search returns a generator, convert to list for easier handling
+    # Perform the searches (through one shared client), keeping each paper once
+    # In watch mode each query stops paging at the last paper already reported
+    search_started = time.monotonic()
+    # In watch mode, queries with a high-water mark get every paper back to it (not just -n);
+    # a query's first run reports the newest -n papers and starts the mark there
+    max_results = num_papers
+    first_page_size = None
+    if watch_state:
+        max_results = {q: WATCH_MAX_RESULTS if watch_state.has(q) else num_papers for q in queries}
+        first_page_size = {q: WATCH_FIRST_PAGE_SIZE for q in queries if watch_state.has(q)}
+    papers_list, matched_queries, capped_queries = harvest_arxiv(
+        queries, max_results = max_results, sort_by = sort_choice,
+        is_seen = watch_state.is_seen if watch_state else None, first_page_size = first_page_size)
+    search_seconds = time.monotonic() - search_started
+    print(f"Search took {search_seconds:.1f} s.\n")
 
     # If no papers are found...
     if not papers_list:
-        print("No papers found.")
+        if watch_state:
+            print("No new papers since the last run.")
+            update_watch_state(watch_state, queries, [], {}, capped_queries)
+        else:
+            print("No papers found.")
         return # Exit the function
 
     print(f"Found {len(papers_list)} papers. Starting summarization...\n")
@@ -65,20 +165,40 @@ def main():
     # Initialize the Gemini client once
     client = genai.Client()
 
+    # Background PDF downloads overlap with summarization and the report
+    downloads = DownloadQueue(args.download_workers) if args.download != "none" else None
+
+    if args.batch:
+        # Summarize everything up front with as few requests as possible
+        batch_summaries = summarize_batch(client, {paper.get_short_id(): paper.summary for paper in papers_list},
+                                          workers=args.workers, requests_per_minute=args.rpm)
+        # A batched request covers several papers, so there is no per-paper latency to record
+        summaries = iter((batch_summaries[paper.get_short_id()], None) for paper in papers_list)
+    else:
+        # Start summarizing every abstract in the background; summaries come back in paper order
+        summaries = summarize_concurrently(client, [paper.summary for paper in papers_list],
+                                           workers=args.workers, requests_per_minute=args.rpm,
+                                           paper_ids=[paper.get_short_id() for paper in papers_list],
+                                           with_timings=True)
+
     # Open the file to write the report
     with open(output_filepath, 'a', encoding='utf-8') as report_file:
         # Write a header for this session
         report_file.write(f"--- arXiv Report: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')} ---\n\n")
-        report_file.write(f"Search Query: '{query}' | # of Papers: {num_papers} | Sort: {sort_choice}\n")
+        report_file.write(f"Search Query: {', '.join(repr(q) for q in queries)} | # of Papers: {num_papers} | Sort: {sort_choice}\n")
         report_file.write("="*50 + "\n\n")
 
         for i, paper in enumerate(papers_list):
+            # Which of the queries found this paper (only shown when several queries ran)
+            matched_line = f"Matched Queries: {', '.join(matched_queries[paper.get_short_id()])}\n" if len(queries) > 1 else ""
+
             # Build the output string
             output_block = (
                 f"--- [ Paper {i+1}/{len(papers_list)} ] ---\n"
                 f"Title: {paper.title}\n"
                 f"Published: {paper.published}\n"
                 f"Link: {paper.pdf_url}\n"
+                f"{matched_line}"
                 #author_names = ", ".join(author.name for author in paper.authors)
                 #f"Authors: {author_names}\n"
                 "Generating summary...\n"
@@ -87,21 +207,59 @@ def main():
             print(output_block)
             report_file.write(output_block)
 
-            # Call summarization function by feeding abstract to Gemini
-            gemini_summary = summarize_text(client, paper.summary) # Specify model by adding input value
+            # Wait for this paper's summary (later papers keep summarizing meanwhile)
+            gemini_summary, summary_seconds = next(summaries)
 
             summary_block = f"Gemini Summary: {gemini_summary}\n\n"
             print(summary_block)
             report_file.write(summary_block)
 
-            # Prompt user about PDF download
-            download_choice = input("Download this paper as PDF? (y/n): ").strip().lower()
-            print("\n")
-            if download_choice == 'y':
-                # If yes, call arxiv_2_pdf with the paper's details
-                arxiv_2_pdf(paper.pdf_url, paper.title)
-                report_file.write("[User chose to download this PDF.]\n\n")
+            if records or index:
+                record = paper_record(paper, gemini_summary, matched_queries[paper.get_short_id()], run_at,
+                                      {'summary_s': summary_seconds})
+                if records:
+                    records.write(record)
+                if index:
+                    index.add_record(record)
+
+            # Queue the PDF download (prompting the user first in 'select' mode)
+            if args.download == "all":
+                downloads.submit(paper.pdf_url, paper.title)
+                report_file.write("[PDF queued for download.]\n\n")
+            elif args.download == "select":
+                download_choice = input("Download this paper as PDF? (y/n): ").strip().lower()
+                print("\n")
+                if download_choice == 'y':
+                    downloads.submit(paper.pdf_url, paper.title)
+                    report_file.write("[User chose to download this PDF.]\n\n")
+
+    # Download summary
+    if downloads:
+        download_summary = downloads.wait()
+        print(f"PDF downloads: {download_summary['saved']}/{download_summary['queued']} saved, "
+              f"{download_summary['failed']} failed ({download_summary['megabytes']} MB in {download_summary['seconds']} s)\n")
+        for title in downloads.failed:
+            print(f"- Failed: {title}")
+        if downloads.failed:
+            print("")
+
+    # Structured output
+    if records:
+        print(f"Appended {records.written} record(s) to '{records.path}'\n")
+        if args.parquet:
+            total = rollup_records(records.path, ROLLUP_PATH)
+            print(f"Rolled up {total} record(s) into '{ROLLUP_PATH}'\n")
+
+    if index:
+        print(f"Search index '{args.index}' now holds {index.count()} papers\n")
+        index.close()
+
+    # Only move the high-water mark once the report is written
+    if watch_state:
+        update_watch_state(watch_state, queries, papers_list, matched_queries, capped_queries)
 
+    if summary_cache.enabled:
+        print(f"Summary store: {summary_cache.stats()}\n")
     print(f"--- [ Process Complete ] ---\nReport saved to '{output_filepath}'\n\n")
 
 if __name__ == "__main__":
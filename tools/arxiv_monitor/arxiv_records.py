@@ -0,0 +1,115 @@
+# arxiv_records.py
+# This module writes one structured record per reported paper (JSONL), with an optional Parquet rollup
+
+import os
+import json
+import datetime
+import threading
+import pyarrow as pa
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+
+# Default record file locations
+RECORDS_PATH = os.path.join("downloads", "arxiv_dl", "arxiv_records.jsonl")
+ROLLUP_PATH = os.path.join("downloads", "arxiv_dl", "arxiv_records.parquet")
+
+# Column layout of the records (also used to read the JSONL back without type guessing)
+RECORD_SCHEMA = pa.schema([
+    ('id', pa.string()),                    # Versioned short id, e.g. '2501.01234v2'
+    ('entry_id', pa.string()),
+    ('title', pa.string()),
+    ('authors', pa.list_(pa.string())),
+    ('published', pa.timestamp('s', tz='UTC')),
+    ('updated', pa.timestamp('s', tz='UTC')),
+    ('primary_category', pa.string()),
+    ('categories', pa.list_(pa.string())),
+    ('pdf_url', pa.string()),
+    ('abstract', pa.string()),
+    ('summary', pa.string()),
+    ('queries', pa.list_(pa.string())),     # Queries that matched the paper in this run
+    ('run_at', pa.timestamp('s', tz='UTC')),
+    ('timings', pa.struct([
+        ('summary_s', pa.float64()),        # This paper's own summarization latency (null in --batch mode)
+    ])),
+])
+
+def _timestamp(value: datetime.datetime | None) -> str | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc).isoformat(timespec='seconds')
+
+def paper_record(paper, summary: str, queries: list[str], run_at: datetime.datetime, timings: dict) -> dict:
+    """
+    Builds the structured record (see RECORD_SCHEMA) for one reported paper.
+
+    Args:
+        paper (arxiv.Result): The search result.
+        summary (str): The Gemini summary.
+        queries (list[str]): The queries that matched the paper.
+        run_at (datetime.datetime): When the run started.
+        timings (dict): Seconds spent on this paper per stage ('summary_s'), None if not measured.
+
+    Returns:
+        dict: A JSON-serializable record.
+    """
+    return {
+        'id': paper.get_short_id(),
+        'entry_id': paper.entry_id,
+        'title': paper.title,
+        'authors': [author.name for author in paper.authors],
+        'published': _timestamp(paper.published),
+        'updated': _timestamp(paper.updated),
+        'primary_category': paper.primary_category,
+        'categories': list(paper.categories),
+        'pdf_url': paper.pdf_url,
+        'abstract': paper.summary,
+        'summary': summary,
+        'queries': list(queries),
+        'run_at': _timestamp(run_at),
+        'timings': {name: None if seconds is None else round(seconds, 3) for name, seconds in timings.items()},
+    }
+
+class RecordWriter:
+    """
+    Appends one JSON line per paper to the records file as soon as the paper is reported,
+    so the history keeps growing across runs and an interrupted run keeps what it finished.
+    """
+    def __init__(self, path: str = RECORDS_PATH):
+        self.path = path
+        self.written = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, record: dict):
+        """
+        Appends one record and flushes it to disk.
+        """
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self.written += 1
+
+def read_records(path: str = RECORDS_PATH) -> pa.Table:
+    """
+    Loads a records file into an Arrow table with the RECORD_SCHEMA columns (native multi-threaded JSON reader).
+    """
+    parse_options = pa_json.ParseOptions(explicit_schema=RECORD_SCHEMA, unexpected_field_behavior='ignore')
+    return pa_json.read_json(path, parse_options=parse_options).select(RECORD_SCHEMA.names)
+
+def rollup_records(path: str = RECORDS_PATH, parquet_path: str = ROLLUP_PATH) -> int:
+    """
+    Rewrites the whole records history as one Parquet file for fast loading.
+
+    Returns:
+        int: The number of records in the rollup.
+    """
+    table = read_records(path)
+    tmp_path = f"{parquet_path}.tmp"
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, parquet_path)
+    return table.num_rows
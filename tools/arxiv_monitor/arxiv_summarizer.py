@@ -1,10 +1,37 @@
 # arxiv_summarizer.py
 # This module provides a function to summarize articles using Gemini API
 
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from google import genai
 from google.genai import types, errors
+from summary_cache import SummaryCache, prompt_hash
 
-def summarize_text(client: genai.Client, text_to_summarize: str, model: str = "gemini-2.5-flash") -> str:
+# Define the generation configuration for the summaries
+SUMMARY_CONFIG = {
+    'temperature': 0.2,
+    'top_p': 0.8,
+}
+
+# Create a specific, instructive prompt for the model
+SUMMARY_PROMPT = """
+        Summarize the following research paper abstract in one or two concise sentences.
+        Focus on the core contributions and the main outcomes of the article.
+
+        Abstract:
+        ---
+        {text}
+        ---
+        """
+
+# Shared summary store (set .enabled = False for --no-cache)
+summary_cache = SummaryCache()
+
+def summarize_text(client: genai.Client, text_to_summarize: str, model: str = "gemini-2.5-flash",
+                   paper_id: str | None = None, limiter: 'QuotaLimiter | None' = None) -> str:
     """
     Uses the Gemini API to summarize a given text.
 
@@ -12,37 +39,34 @@ def summarize_text(client: genai.Client, text_to_summarize: str, model: str = "g
         client (genai.Client): The Gemini API client.
         text_to_summarize (str): The text to be summarized
         model (str): The model to use for summarization.
+        paper_id (str | None): Versioned arXiv id (e.g. '2501.01234v2'); if given, the summary store is checked first.
+        limiter (QuotaLimiter | None): Quota to wait for before calling the API (not needed on a store hit).
 
     Returns:
         str: the concise summary created by the model
     """
+    cache_key = prompt_hash(SUMMARY_PROMPT, SUMMARY_CONFIG)
+    if paper_id:
+        cached = summary_cache.get(paper_id, model, cache_key)
+        if cached is not None:
+            return cached
 
     try:
-        # Define the generation configuration for the summaries
-        config = types.GenerateContentConfig(
-            temperature=0.2,
-            top_p=0.8,
-        )
-
-        # Create a specific, instructive prompt for the model
-        prompt = f"""
-        Summarize the following research paper abstract in one or two concise sentences.
-        Focus on the core contributions and the main outcomes of the article.
-
-        Abstract:
-        ---
-        {text_to_summarize}
-        ---
-        """
+        if limiter is not None:
+            limiter.acquire()
 
         # Call the API
         response = client.models.generate_content(
             model=model,
-            contents=prompt,
-            config=config
+            contents=SUMMARY_PROMPT.format(text=text_to_summarize),
+            config=types.GenerateContentConfig(**SUMMARY_CONFIG)
         )
-    
-        return response.text.strip()
+        summary = response.text.strip()
+
+        # Errors (below) are never stored, so they are retried on the next run
+        if paper_id:
+            summary_cache.put(paper_id, model, cache_key, summary)
+        return summary
     
     except errors.APIError as e:
         print(f"An API error occurred during summarization: {e}")
@@ -52,8 +76,271 @@ def summarize_text(client: genai.Client, text_to_summarize: str, model: str = "g
         print(f"An unexpected error occurred during summarization: {e}")
         return "Error: Could not generate summary."
 
+class QuotaLimiter:
+    """
+    Sliding-window limiter that allows at most `requests_per_minute` calls in any 60 second window,
+    so concurrent summaries stay within the Gemini per-minute quota.
+    The clock and sleep functions can be swapped for fakes in tests.
+    """
+    def __init__(self, requests_per_minute: int = 60, clock=time.monotonic, sleep=time.sleep):
+        self.requests_per_minute = requests_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self._sent = deque()    # Start times of the requests in the current window
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request fits in the quota, then records it.
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                while self._sent and now - self._sent[0] >= 60:
+                    self._sent.popleft()
+                if len(self._sent) < self.requests_per_minute:
+                    self._sent.append(now)
+                    return
+                wait = 60 - (now - self._sent[0])
+            self.sleep(wait)
+
+def _timed_summary(*args) -> tuple[str, float]:
+    """
+    Runs summarize_text(*args) on a pool thread and returns (summary, seconds it took on that thread).
+    """
+    started = time.monotonic()
+    summary = summarize_text(*args)
+    return summary, time.monotonic() - started
+
+def summarize_concurrently(client: genai.Client, texts: list[str], model: str = "gemini-2.5-flash",
+                           workers: int = 4, requests_per_minute: int = 60, limiter: QuotaLimiter | None = None,
+                           paper_ids: list[str] | None = None, with_timings: bool = False):
+    """
+    Summarizes several texts concurrently on a bounded thread pool.
+
+    Args:
+        client (genai.Client): The Gemini API client (or any object with the same models.generate_content()).
+        texts (list[str]): The texts to be summarized.
+        model (str): The model to use for summarization.
+        workers (int): Maximum number of requests in flight.
+        requests_per_minute (int): Per-minute request quota shared by all workers.
+        limiter (QuotaLimiter | None): Limiter to use instead of creating one from requests_per_minute.
+        paper_ids (list[str] | None): Versioned arXiv ids matching `texts`, used to look up stored summaries.
+        with_timings (bool): Yield (summary, seconds) pairs, where seconds is that summary's own latency
+            (quota wait plus API call, about 0 for a stored summary), measured on its worker thread.
+
+    Yields:
+        str: The summaries, in the same order as `texts`. Each one is yielded as soon as it and every
+             summary before it are done, while later ones keep running in the background.
+    """
+    limiter = limiter or QuotaLimiter(requests_per_minute)
+
+    paper_ids = paper_ids or [None] * len(texts)
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = [executor.submit(_timed_summary, client, text, model, paper_id, limiter)
+                   for text, paper_id in zip(texts, paper_ids)]
+        for future in futures:
+            summary, seconds = future.result()
+            yield (summary, seconds) if with_timings else summary
+    finally:
+        # Don't start summaries nobody will read if the caller stops early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# --- Batched summaries ---
+# Several abstracts share one request (and one copy of the instructions); the model answers with
+# a JSON list of {id, summary} objects (response schemas can't express a map with arbitrary keys)
+BATCH_PROMPT = """
+        Summarize each of the following research paper abstracts in one or two concise sentences.
+        Focus on the core contributions and the main outcomes of each article.
+        Return exactly one entry per abstract, using its id exactly as given.
+        """
+
+BATCH_RESPONSE_SCHEMA = {
+    'type': 'ARRAY',
+    'items': {
+        'type': 'OBJECT',
+        'properties': {
+            'id': {'type': 'STRING'},
+            'summary': {'type': 'STRING'},
+        },
+        'required': ['id', 'summary'],
+    },
+}
+
+BATCH_CONFIG = {
+    **SUMMARY_CONFIG,
+    'response_mime_type': 'application/json',
+    'response_schema': BATCH_RESPONSE_SCHEMA,
+}
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for English text (about 4 characters per token), used to size batches without an API call.
+    """
+    return len(text) // 4 + 1
+
+def plan_batches(texts: dict[str, str], max_input_tokens: int = 8000, max_batch_size: int = 20) -> list[list[str]]:
+    """
+    Groups paper ids into batches whose prompts stay within the token budget.
+
+    Args:
+        texts (dict[str, str]): Abstracts keyed by paper id.
+        max_input_tokens (int): Estimated prompt tokens allowed per request.
+        max_batch_size (int): Maximum abstracts per request (keeps each response short enough to finish).
+
+    Returns:
+        list[list[str]]: Paper ids per batch, in input order.
+    """
+    base_cost = estimate_tokens(BATCH_PROMPT)
+    batches, current, used = [], [], base_cost
+    for paper_id, text in texts.items():
+        cost = estimate_tokens(text) + estimate_tokens(paper_id) + 4     # + separators
+        if current and (used + cost > max_input_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current, used = [], base_cost
+        current.append(paper_id)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _request_batch(client: genai.Client, texts: dict[str, str], ids: list[str], model: str) -> dict[str, str]:
+    """
+    Sends one batched request and returns the summaries it contains, keyed by paper id.
+    Raises on API errors or a response that isn't the expected JSON.
+    """
+    config = types.GenerateContentConfig(**BATCH_CONFIG)
+    abstracts = "\n".join(f"[id: {paper_id}]\n{texts[paper_id].strip()}\n---" for paper_id in ids)
+    prompt = f"{BATCH_PROMPT}\n        Abstracts:\n        ---\n{abstracts}\n"
+
+    response = client.models.generate_content(model=model, contents=prompt, config=config)
+    entries = json.loads(response.text)
+    return {entry['id']: entry['summary'].strip() for entry in entries
+            if entry.get('id') in texts and entry.get('summary')}
+
+def _summarize_split(client: genai.Client, texts: dict[str, str], ids: list[str], model: str,
+                     limiter: QuotaLimiter) -> dict[str, str]:
+    """
+    Summarizes a batch, splitting it in half and retrying whenever a request fails, and
+    re-requesting only the ids a partial response left out.
+    A single abstract that still fails falls back to summarize_text().
+    Successful batch summaries are stored in the summary store under the batch prompt's hash.
+    """
+    limiter.acquire()
+    try:
+        summaries = _request_batch(client, texts, ids, model)
+        cache_key = prompt_hash(BATCH_PROMPT, BATCH_CONFIG)
+        for paper_id, summary in summaries.items():
+            summary_cache.put(paper_id, model, cache_key, summary)
+    except Exception as e:
+        print(f"Batch of {len(ids)} abstract(s) failed: {e}")
+        summaries = {}
+
+    missing = [paper_id for paper_id in ids if paper_id not in summaries]
+    if not missing:
+        return summaries
+
+    if len(ids) == 1:
+        summaries[ids[0]] = summarize_text(client, texts[ids[0]], model, ids[0], limiter)
+    elif len(missing) == len(ids):
+        middle = len(ids) // 2
+        summaries.update(_summarize_split(client, texts, ids[:middle], model, limiter))
+        summaries.update(_summarize_split(client, texts, ids[middle:], model, limiter))
+    else:
+        summaries.update(_summarize_split(client, texts, missing, model, limiter))
+    return summaries
+
+def summarize_batch(client: genai.Client, texts: dict[str, str], model: str = "gemini-2.5-flash",
+                    max_input_tokens: int = 8000, max_batch_size: int = 20, workers: int = 1,
+                    requests_per_minute: int = 60, limiter: QuotaLimiter | None = None) -> dict[str, str]:
+    """
+    Summarizes many abstracts with as few requests as possible by packing several into each prompt.
+
+    Args:
+        client (genai.Client): The Gemini API client.
+        texts (dict[str, str]): Abstracts keyed by versioned arXiv id (e.g. '2501.01234v2'); stored summaries are reused.
+        model (str): The model to use for summarization.
+        max_input_tokens (int): Estimated prompt tokens allowed per request; sets how many abstracts share one.
+        max_batch_size (int): Maximum abstracts per request.
+        workers (int): Number of batches sent concurrently.
+        requests_per_minute (int): Per-minute request quota shared by all workers.
+        limiter (QuotaLimiter | None): Limiter to use instead of creating one from requests_per_minute.
+
+    Returns:
+        dict[str, str]: Summaries keyed by paper id, in the same order as `texts`.
+    """
+    limiter = limiter or QuotaLimiter(requests_per_minute)
+
+    # Only abstracts without a stored summary are sent
+    summaries = {}
+    cache_key = prompt_hash(BATCH_PROMPT, BATCH_CONFIG)
+    for paper_id in texts:
+        cached = summary_cache.get(paper_id, model, cache_key)
+        if cached is not None:
+            summaries[paper_id] = cached
+    pending = {paper_id: text for paper_id, text in texts.items() if paper_id not in summaries}
+
+    batches = plan_batches(pending, max_input_tokens, max_batch_size)
+    print(f"Summarizing {len(pending)} abstracts in {len(batches)} batched request(s) "
+          f"({len(summaries)} already summarized)...\n")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for batch_summaries in executor.map(lambda ids: _summarize_split(client, pending, ids, model, limiter), batches):
+            summaries.update(batch_summaries)
+    return {paper_id: summaries[paper_id] for paper_id in texts}
+
+def _check_quota_limiter():
+    """
+    Drives a QuotaLimiter through a full window, a blocked request and the window sliding on,
+    on a fake clock (no real waiting, no API calls).
+    """
+    class FakeClock:
+        def __init__(self):
+            self.now = 0.0
+            self.slept = []
+
+        def __call__(self) -> float:
+            return self.now
+
+        def sleep(self, seconds: float):
+            self.slept.append(seconds)
+            self.now += seconds
+
+    clock = FakeClock()
+    limiter = QuotaLimiter(requests_per_minute=3, clock=clock, sleep=clock.sleep)
+
+    # Three requests fit in the window straight away (spread over 20 s)
+    for start in (0, 10, 20):
+        clock.now = start
+        limiter.acquire()
+    assert clock.slept == [], clock.slept
+
+    # The 4th waits until the first one leaves the window (60 s after it started)
+    clock.now = 30
+    limiter.acquire()
+    assert clock.slept == [30] and clock.now == 60, (clock.slept, clock.now)
+
+    # The window slides: the next request waits for the one sent at 10 s, not a whole new minute
+    limiter.acquire()
+    assert clock.slept == [30, 10] and clock.now == 70, (clock.slept, clock.now)
+
+    # After a quiet minute the whole quota is available again
+    clock.now = 200
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.slept == [30, 10] and len(limiter._sent) == 3
+    print(f"QuotaLimiter: 3 requests/minute held on the fake clock (waits {clock.slept} s).")
+
 # This block is used to test the script when running directly
 if __name__ == "__main__":
+    import sys
+
+    # Offline check of the quota limiter instead of the live summary below
+    if '--self-check' in sys.argv:
+        _check_quota_limiter()
+        sys.exit()
+
     # An example abstract from "Attention Is All You Need"
     example_abstract = """
     The dominant sequence transduction models are based on complex recurrent or
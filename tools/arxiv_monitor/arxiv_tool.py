@@ -2,6 +2,7 @@
 # This module provides a function to fetch and parse arXiv papers.
 
 #import libraries
+import threading
 import arxiv
 
 # Map strings to Arxiv Enum for sort criteria
@@ -11,7 +12,63 @@ SORT_CRITERIA_MAP = {
     "submitted": arxiv.SortCriterion.SubmittedDate  # submitted_date
 }
 
-def search_arxiv(query: str, max_results: int = 3, sort_by: str = "submitted"):
+# Default client settings
+PAGE_SIZE = 500         # Results per API request (the API allows up to 2000); capped per search to what's needed
+DELAY_SECONDS = 3.0     # Pause between API requests (arXiv asks for at least 3 seconds)
+NUM_RETRIES = 5         # Retries for a failing or unexpectedly empty page
+
+class _SharedArxivClient(arxiv.Client):
+    """
+    arxiv.Client meant to be shared by every search in the process, so the keep-alive session
+    and the delay between requests carry over from one search to the next.
+
+    Pages are capped at the number of results a search still needs (a 3-paper search fetches 3
+    entries instead of a full page), so a large page size only helps big harvests.
+    A search with a `first_page_size` attribute (see search_arxiv) starts with a page of that size and
+    doubles the page as it goes (f, f, 2f, 4f, ... up to the page size), so a search that usually stops
+    early, like a watch-mode search stopping at the first seen paper, doesn't download a full page.
+    Requests from different threads are serialized, which keeps the shared delay honest.
+    """
+    def __init__(self, page_size: int = PAGE_SIZE, delay_seconds: float = DELAY_SECONDS,
+                 num_retries: int = NUM_RETRIES):
+        super().__init__(page_size=page_size, delay_seconds=delay_seconds, num_retries=num_retries)
+        self._request_lock = threading.RLock()  # Re-entrant, since _parse_feed() retries recursively
+
+    def _format_url(self, search: arxiv.Search, start: int, page_size: int) -> str:
+        first_page_size = getattr(search, 'first_page_size', None)
+        if first_page_size:
+            # Each page is as large as everything fetched before it, so pages double
+            page_size = min(page_size, max(first_page_size, start))
+        if search.max_results is not None:
+            page_size = max(1, min(page_size, search.max_results - start))
+        return super()._format_url(search, start, page_size)
+
+    def _parse_feed(self, url: str, first_page: bool = True, _try_index: int = 0):
+        with self._request_lock:
+            return super()._parse_feed(url, first_page=first_page, _try_index=_try_index)
+
+# Shared client used by search_arxiv() and search_arxiv_many()
+arxiv_client = _SharedArxivClient()
+
+def configure_client(page_size: int | None = None, delay_seconds: float | None = None,
+                     num_retries: int | None = None):
+    """
+    Changes the shared client's settings (its session is kept).
+
+    Args:
+        page_size (int | None): Results per API request; larger pages mean fewer requests (and delays) for big harvests.
+        delay_seconds (float | None): Seconds to wait between API requests.
+        num_retries (int | None): Retries for a failing page.
+    """
+    if page_size is not None:
+        arxiv_client.page_size = page_size
+    if delay_seconds is not None:
+        arxiv_client.delay_seconds = delay_seconds
+    if num_retries is not None:
+        arxiv_client.num_retries = num_retries
+
+def search_arxiv(query: str, max_results: int = 3, sort_by: str = "submitted", client: arxiv.Client | None = None,
+                 first_page_size: int | None = None):
     """
     Searches the arXiv API for a given query and returns the results.
 
@@ -19,12 +76,15 @@ def search_arxiv(query: str, max_results: int = 3, sort_by: str = "submitted"):
         query (str): the search term to look for
         max_results (int): The maximum number of results to return
         sort_by (str): The sorting criterion, can only be "relevance", "last_updated_date", or "submitted_date"
+        client (arxiv.Client | None): The client to search with (default: the shared arxiv_client)
+        first_page_size (int | None): Start with a page this small and grow it only while results are still
+                                      being consumed (honoured by the shared client)
     
     Returns:
         A generator of arxiv.Result objects
     """
-    # create a client to search arXiv
-    client = arxiv.Client()
+    # use the shared client to search arXiv
+    client = client or arxiv_client
 
     # look up sort criterion from the map and provide a safe default value
     sort_criterion = SORT_CRITERIA_MAP.get(sort_by.lower())
@@ -39,6 +99,7 @@ def search_arxiv(query: str, max_results: int = 3, sort_by: str = "submitted"):
         sort_by = sort_criterion
         # sort_order = arxiv.SortOrder.Descending
     )
+    search.first_page_size = first_page_size
 
     # perform the search using client.results() method
     results = client.results(search)
@@ -46,6 +107,68 @@ def search_arxiv(query: str, max_results: int = 3, sort_by: str = "submitted"):
     # return the results generator to the caller
     return results
 
+def search_arxiv_many(queries: list[str], max_results: int = 3, sort_by: str = "submitted",
+                      client: arxiv.Client | None = None) -> dict[str, list[arxiv.Result]]:
+    """
+    Runs several searches one after another through the same client (one session, one shared delay).
+
+    Args:
+        queries (list[str]): the search terms to look for
+        max_results (int): The maximum number of results to return per query
+        sort_by (str): The sorting criterion (see search_arxiv)
+        client (arxiv.Client | None): The client to search with (default: the shared arxiv_client)
+
+    Returns:
+        dict: The list of arxiv.Result objects for each query, in query order
+    """
+    results = {}
+    for query in queries:
+        results[query] = list(search_arxiv(query, max_results=max_results, sort_by=sort_by, client=client))
+    return results
+
+def harvest_arxiv(queries: list[str], max_results: int | dict[str, int] = 3, sort_by: str = "submitted",
+                  is_seen=None, client: arxiv.Client | None = None, first_page_size: int | dict[str, int] | None = None
+                  ) -> tuple[list[arxiv.Result], dict[str, list[str]], list[str]]:
+    """
+    Runs several searches through the same client and merges the results, keeping each paper once.
+
+    Args:
+        queries (list[str]): the search terms to look for
+        max_results (int | dict[str, int]): The maximum number of results to return per query
+                                            (one number for every query, or a number per query)
+        sort_by (str): The sorting criterion (see search_arxiv)
+        is_seen (callable | None): Called as is_seen(query, paper); a query stops paging at the first paper
+                                   for which it returns True (e.g. WatchState.is_seen for newest-first searches)
+        client (arxiv.Client | None): The client to search with (default: the shared arxiv_client)
+        first_page_size (int | dict[str, int] | None): Size of each query's first page (see search_arxiv);
+                                                       pages only grow while no seen paper has been reached
+
+    Returns:
+        tuple: (unique papers in first-seen order, the queries that matched each paper keyed by its short id,
+                the queries that hit max_results before reaching a seen paper, i.e. may have more unseen papers)
+    """
+    papers = {}
+    matches = {}
+    capped = []
+    for query in queries:
+        limit = max_results[query] if isinstance(max_results, dict) else max_results
+        first_page = first_page_size.get(query) if isinstance(first_page_size, dict) else first_page_size
+        results = search_arxiv(query, max_results=limit, sort_by=sort_by, client=client, first_page_size=first_page)
+        count = 0
+        reached_seen = False
+        for paper in results:
+            if is_seen is not None and is_seen(query, paper):
+                reached_seen = True
+                break
+            count += 1
+            paper_id = paper.get_short_id()
+            papers.setdefault(paper_id, paper)
+            matches.setdefault(paper_id, []).append(query)
+        if not reached_seen and count >= limit:
+            capped.append(query)
+        print(f"'{query}': {count} paper(s), {len(papers)} unique so far")
+    return list(papers.values()), matches, capped
+
 # This block is used to directly test the search_arxiv function
 if __name__ == "__main__":
     print("\n--- Running a test search for 'Large Language Models' ---")
@@ -0,0 +1,142 @@
+# summary_cache.py
+# This module provides a persistent SQLite store for Gemini summaries, so papers are only summarized once
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Default store location (override with the ARXIV_SUMMARY_CACHE environment variable)
+CACHE_PATH = os.getenv("ARXIV_SUMMARY_CACHE", os.path.join("downloads", "arxiv_cache", "summaries.sqlite"))
+MAX_CACHE_BYTES = 50 * 1024 * 1024      # Cap on stored summary text (50 MB)
+
+def prompt_hash(template: str, config: dict) -> str:
+    """
+    Fingerprint of a prompt template and generation config, so editing either invalidates old summaries.
+    """
+    payload = json.dumps({'template': template, 'config': config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class SummaryCache:
+    """
+    Summaries keyed by (paper id, model, prompt hash), stored in one SQLite file.
+
+    The paper id should include the arXiv version (e.g. '2501.01234v2'), so a revised abstract
+    gets a fresh summary. Least recently used rows are evicted once the stored text exceeds max_bytes.
+    The stored size is kept as a running total in a one-row 'cache_meta' entry, updated in the same
+    transaction as each write (so processes sharing the file agree on it), and only summed once per file.
+    The connection is opened on first use and shared by all threads behind a lock.
+
+    Attributes:
+        enabled (bool): If False, the store is neither read nor written (--no-cache).
+    """
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_CACHE_BYTES, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    paper_id TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (paper_id, model, prompt_hash)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # Stores created before the running total get it from one full scan
+            if self._conn.execute("SELECT 1 FROM cache_meta WHERE name = 'total_bytes'").fetchone() is None:
+                self._conn.execute("""
+                    INSERT INTO cache_meta (name, value)
+                    SELECT 'total_bytes', COALESCE(SUM(LENGTH(CAST(summary AS BLOB))), 0) FROM summaries
+                """)
+            self._conn.commit()
+        return self._conn
+
+    def get(self, paper_id: str, model: str, prompt_key: str) -> str | None:
+        """
+        Returns the stored summary, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT summary FROM summaries WHERE paper_id = ? AND model = ? AND prompt_hash = ?",
+                               (paper_id, model, prompt_key)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            # Mark as recently used
+            conn.execute("UPDATE summaries SET last_used = ? WHERE paper_id = ? AND model = ? AND prompt_hash = ?",
+                         (time.time(), paper_id, model, prompt_key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, paper_id: str, model: str, prompt_key: str, summary: str):
+        """
+        Stores a summary, then evicts old rows if the store is over its size cap.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # A replaced summary no longer counts towards the total
+            replaced = conn.execute("SELECT LENGTH(CAST(summary AS BLOB)) FROM summaries "
+                                    "WHERE paper_id = ? AND model = ? AND prompt_hash = ?",
+                                    (paper_id, model, prompt_key)).fetchone()
+            conn.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)",
+                         (paper_id, model, prompt_key, summary, now, now))
+            delta = len(summary.encode('utf-8')) - (replaced[0] if replaced else 0)
+            conn.execute("UPDATE cache_meta SET value = value + ? WHERE name = 'total_bytes'", (delta,))
+            total = conn.execute("SELECT value FROM cache_meta WHERE name = 'total_bytes'").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(conn, total)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, total: int):
+        """
+        Deletes least recently used rows until the stored text (currently `total` bytes) fits within max_bytes.
+        """
+        rows = conn.execute("SELECT rowid, LENGTH(CAST(summary AS BLOB)) FROM summaries ORDER BY last_used").fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((rowid,))
+            total -= size
+        conn.executemany("DELETE FROM summaries WHERE rowid = ?", doomed)
+        conn.execute("UPDATE cache_meta SET value = ? WHERE name = 'total_bytes'", (total,))
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the number of stored summaries.
+        """
+        entries = 0
+        if self.enabled and (self._conn is not None or os.path.exists(self.path)):
+            with self._lock:
+                entries = self._connect().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
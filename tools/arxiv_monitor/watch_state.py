@@ -0,0 +1,82 @@
+# watch_state.py
+# This module remembers the newest paper seen for each query, so watch runs only report new papers
+
+import os
+import re
+import json
+import datetime
+
+# Default state file location
+STATE_PATH = os.path.join("downloads", "arxiv_cache", "watch_state.json")
+
+def base_id(paper) -> str:
+    """
+    Returns a paper's arXiv id without its version (e.g. '2501.01234' for '2501.01234v2').
+    """
+    return re.sub(r'v\d+$', '', paper.get_short_id())
+
+class WatchState:
+    """
+    Per-query high-water marks, stored as one JSON file:
+        {query: {'newest_published': ISO datetime, 'newest_ids': [ids published at that time], 'last_run': ISO datetime}}
+
+    Searches sorted by submission date (newest first) can stop at the first paper that is_seen(),
+    since every paper after it was already reported by an earlier run.
+    """
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self.queries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.queries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not read watch state '{path}' ({e}), starting fresh.")
+
+    def has(self, query: str) -> bool:
+        """
+        Returns True if an earlier run recorded a high-water mark for the query.
+        """
+        return query in self.queries
+
+    def is_seen(self, query: str, paper) -> bool:
+        """
+        Returns True if the paper is not newer than the newest paper recorded for the query.
+        """
+        entry = self.queries.get(query)
+        if not entry:
+            return False
+        newest = datetime.datetime.fromisoformat(entry['newest_published'])
+        if paper.published != newest:
+            return paper.published < newest
+        # Several papers can share a timestamp, so the ids at the boundary are kept too
+        return base_id(paper) in entry['newest_ids']
+
+    def update(self, query: str, papers: list):
+        """
+        Records the newest of the given papers as the query's high-water mark.
+        """
+        entry = self.queries.get(query, {})
+        if papers:
+            newest = max(paper.published for paper in papers)
+            newest_ids = [base_id(paper) for paper in papers if paper.published == newest]
+            if entry.get('newest_published') == newest.isoformat():
+                newest_ids = sorted(set(entry['newest_ids']) | set(newest_ids))
+            if not entry or newest >= datetime.datetime.fromisoformat(entry['newest_published']):
+                entry['newest_published'] = newest.isoformat()
+                entry['newest_ids'] = newest_ids
+        entry['last_run'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        if 'newest_published' in entry:
+            self.queries[query] = entry
+
+    def save(self):
+        """
+        Writes the state file atomically.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.queries, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,399 @@
+# tools/gtrends_analyzer/trends_cache.py
+# This module provides a persistent on-disk cache for raw Google Trends responses
+
+# import libraries
+import os
+import re
+import json
+import time
+import hashlib
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Default cache location (override with the GTRENDS_CACHE_DIR environment variable)
+CACHE_DIR = os.getenv("GTRENDS_CACHE_DIR", os.path.join("..", "..", "downloads", "gtrends_cache"))
+MAX_CACHE_BYTES = 200 * 1024 * 1024     # LRU size cap (200 MB)
+EVICT_TO_FRACTION = 0.9                 # Eviction frees space down to this fraction of the cap, so a full
+                                        # cache isn't rescanned on every following write
+
+# Seconds before a cached response goes stale, by timeframe
+# Short, recent windows change quickly, long windows only gain a point per day/week/month
+TTL_BY_TIMEFRAME = {
+    'now 1-H': 5 * 60,
+    'now 4-H': 15 * 60,
+    'now 1-d': 30 * 60,
+    'now 7-d': 60 * 60,
+    'today 1-m': 6 * 60 * 60,
+    'today 3-m': 6 * 60 * 60,
+    'today 12-m': 12 * 60 * 60,
+    'today 5-y': 24 * 60 * 60,
+    'all': 24 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60               # Unknown or custom ranges that include today
+HISTORICAL_TTL = 7 * 24 * 60 * 60   # Custom ranges that end in the past
+
+def ttl_for_timeframe(timeframe: str) -> int:
+    """
+    Returns the time-to-live (in seconds) for cached data of the given timeframe.
+
+    Args:
+        timeframe (str): A pytrends timeframe string (e.g. 'now 1-H', 'today 5-y', '2025-01-01 2025-06-30').
+
+    Returns:
+        int: Number of seconds a cached response stays fresh.
+    """
+    timeframe = timeframe.strip()
+    if timeframe in TTL_BY_TIMEFRAME:
+        return TTL_BY_TIMEFRAME[timeframe]
+
+    # Custom date ('YYYY-MM-DD YYYY-MM-DD') or datetime ('YYYY-MM-DDTHH YYYY-MM-DDTHH') ranges
+    match = re.fullmatch(r"\S+ (\d{4}-\d{2}-\d{2})(T\d{2})?", timeframe)
+    if match:
+        end_date = datetime.date.fromisoformat(match.group(1))
+        if end_date < datetime.date.today():
+            return HISTORICAL_TTL
+    return DEFAULT_TTL
+
+class TrendsCache:
+    """
+    Content-addressed cache of raw Google Trends responses, stored as Parquet files.
+
+    Entries are keyed by a hash of (kind, keywords, timeframe, geo, cat, gprop). Freshness uses the
+    file's modification time (= fetch time) and LRU eviction uses its access time, which is bumped
+    explicitly on every hit, so no separate index file is needed.
+
+    The cache size is kept as a running total (one directory scan on the first write, then updated
+    per write/removal), so the directory is only walked again when the total goes over max_bytes.
+    That scan also picks up entries written or removed by other processes sharing the directory.
+
+    Attributes:
+        enabled (bool): If False, the cache is neither read nor written (--no-cache).
+        refresh (bool): If True, cached entries are ignored but fresh results are still written (--refresh).
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES,
+                 enabled: bool = True, refresh: bool = False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None    # Running size of all entries, None until the first scan
+        self._lock = threading.Lock()   # Reads and writes come from several scheduler threads
+
+    def make_key(self, kind: str, kw_list: list[str], timeframe: str, geo: str = '', cat: int = 0,
+                 gprop: str = '') -> str:
+        """
+        Builds the content address for a request.
+        Keyword order is kept, since Google normalizes a payload relative to all of its keywords.
+        """
+        request = {'kind': kind, 'kw_list': list(kw_list), 'timeframe': timeframe.strip(),
+                   'geo': geo, 'cat': cat, 'gprop': gprop}
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.parquet")
+
+    def _read(self, key: str, timeframe: str, refresh: bool | None = None) -> pa.Table | None:
+        """
+        Returns the cached table for a key if it exists and is still fresh, otherwise None.
+        refresh overrides the instance's refresh flag for this read.
+        """
+        if not self.enabled or (self.refresh if refresh is None else refresh):
+            return None
+
+        path = self._path(key)
+        try:
+            fetched_at = os.path.getmtime(path)
+        except OSError:
+            self._count(hit=False)
+            return None
+
+        # Drop stale entries
+        if time.time() - fetched_at > ttl_for_timeframe(timeframe):
+            self._remove(path)
+            self._count(hit=False)
+            return None
+
+        try:
+            table = pq.read_table(path)
+        except Exception as e:
+            print(f"Warning: could not read cache entry '{path}': {e}")
+            self._remove(path)
+            self._count(hit=False)
+            return None
+
+        # Mark as recently used (access time only, keep the fetch time)
+        os.utime(path, (time.time(), fetched_at))
+        self._count(hit=True)
+        return table
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _write(self, key: str, table: pa.Table):
+        """
+        Atomically writes a table to the cache, then enforces the size cap.
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            pq.write_table(table, tmp_path)
+            size = os.path.getsize(tmp_path)
+            replaced = self._size(path)     # An overwritten entry no longer counts
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Warning: could not write cache entry '{path}': {e}")
+            self._remove(tmp_path)
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                # First write: one scan (which already includes this entry)
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += size - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _size(self, path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _remove(self, path: str):
+        size = self._size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        if path.endswith('.parquet'):
+            with self._lock:
+                if self._total_bytes is not None:
+                    self._total_bytes = max(0, self._total_bytes - size)
+
+    def _scan(self) -> list[tuple[float, int, str]]:
+        """
+        Returns (access time, size, path) for every cache entry.
+        """
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.parquet'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_atime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """
+        Deletes least recently used entries until the cache fits within EVICT_TO_FRACTION of max_bytes
+        (caller holds the lock). Rescans the directory, so the running total is corrected for other
+        processes' writes too.
+        """
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            self._total_bytes = total
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICT_TO_FRACTION:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+    # --- Interest Over Time ---
+    def get_iot(self, kw_list: list[str], timeframe: str, geo: str = '', cat: int = 0,
+                gprop: str = '', refresh: bool | None = None) -> pd.DataFrame | None:
+        """
+        Returns the cached interest_over_time() DataFrame for a payload, or None on a miss.
+        """
+        table = self._read(self.make_key('iot', kw_list, timeframe, geo, cat, gprop), timeframe, refresh)
+        return table.to_pandas() if table is not None else None
+
+    def put_iot(self, kw_list: list[str], timeframe: str, interest_df: pd.DataFrame, geo: str = '',
+                cat: int = 0, gprop: str = ''):
+        """
+        Stores an interest_over_time() DataFrame for a payload.
+        """
+        key = self.make_key('iot', kw_list, timeframe, geo, cat, gprop)
+        self._write(key, pa.Table.from_pandas(interest_df, preserve_index=True))
+
+    # --- Related Queries ---
+    def get_rq(self, keyword: str, timeframe: str, geo: str = '', cat: int = 0,
+               gprop: str = '', refresh: bool | None = None) -> dict | None:
+        """
+        Returns the cached {'top': DataFrame | None, 'rising': DataFrame | None} for a keyword, or None on a miss.
+        """
+        table = self._read(self.make_key('rq', [keyword], timeframe, geo, cat, gprop), timeframe, refresh)
+        if table is None:
+            return None
+
+        # Both parts are stored in one table, tagged by a '_part' column
+        parts = json.loads(table.schema.metadata[b'rq_parts'])
+        df = table.to_pandas()
+        rq = {}
+        for part in ('top', 'rising'):
+            if part in parts:
+                rq[part] = df[df['_part'] == part].drop(columns=['_part']).reset_index(drop=True)
+            else:
+                rq[part] = None
+        return rq
+
+    def put_rq(self, keyword: str, timeframe: str, rq: dict, geo: str = '', cat: int = 0, gprop: str = ''):
+        """
+        Stores the {'top': ..., 'rising': ...} related queries result for a keyword.
+        Parts that are None (no data from Google) are recorded as such.
+        """
+        frames = []
+        parts = []
+        for part in ('top', 'rising'):
+            part_df = rq.get(part)
+            if part_df is not None:
+                frames.append(part_df.assign(_part=part))
+                parts.append(part)
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({'_part': pd.Series(dtype=str)})
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'rq_parts'] = json.dumps(parts).encode('utf-8')
+        key = self.make_key('rq', [keyword], timeframe, geo, cat, gprop)
+        self._write(key, table.replace_schema_metadata(metadata))
+
+MAX_MEMORY_BYTES = 256 * 1024 * 1024   # Size cap of the in-memory shared cache (256 MB)
+
+def _estimate_bytes(value) -> int:
+    """
+    Rough in-memory size of a cached response (a DataFrame or an RQ dict of DataFrames).
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        return sum(_estimate_bytes(part) for part in value.values() if part is not None)
+    return 0
+
+class SharedFetchCache:
+    """
+    Process-wide in-memory cache in front of the fetch functions, shared by every thread (e.g. all GUI sessions).
+
+    Identical requests that arrive while one is already in flight wait for that fetch instead of starting
+    their own (request coalescing), so two analysts asking for the same keyword only cost one request.
+    Entries expire with the same per-timeframe TTL as TrendsCache and the least recently used ones are
+    dropped once the estimated size exceeds max_bytes. Failed fetches (None) are handed to the waiters
+    but not cached.
+    """
+    def __init__(self, max_bytes: int = MAX_MEMORY_BYTES, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0      # Requests that waited on another thread's fetch
+        self._entries = OrderedDict()   # key -> (expires_at, size, value), least recently used first
+        self._in_flight = {}    # key -> Future of the running fetch
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key: str, timeframe: str, fetch, refresh: bool = False):
+        """
+        Returns the cached value for key, or waits for / runs fetch() to produce it.
+
+        Args:
+            key (str): Request key (e.g. TrendsCache.make_key(...)).
+            timeframe (str): The request's timeframe, used for the TTL.
+            fetch (callable): Called with no arguments to fetch the value on a miss.
+            refresh (bool): Skip cached values (concurrent identical requests are still coalesced).
+
+        Returns:
+            The value, or None if the fetch failed.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh:
+                expires_at, _, value = entry
+                if self.clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                self._in_flight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if value is not None:
+                self._store(key, value, self.clock() + ttl_for_timeframe(timeframe))
+        future.set_result(value)
+        return value
+
+    def _store(self, key: str, value, expires_at: float):
+        size = _estimate_bytes(value)
+        if size > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        # Evict least recently used entries
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self):
+        """
+        Drops every cached value (in-flight fetches are unaffected).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss/coalesced counters, the number of entries and their estimated size in MB.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced,
+                    'entries': len(self._entries), 'megabytes': round(self._bytes / (1024 * 1024), 1),
+                    'in_flight': len(self._in_flight)}
@@ -0,0 +1,164 @@
+# tools/gtrends_analyzer/trends_charts.py
+# This module prepares IOT data for charting: downsampling, keyword selection and paging
+
+# import libraries
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Default number of points kept per series (about one per horizontal pixel of a wide chart)
+MAX_POINTS = 1000
+
+def _positions(index: pd.Index) -> np.ndarray:
+    """
+    Returns the index as float x positions (nanoseconds for dates).
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    return np.asarray(index, dtype=np.float64)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: picks `threshold` points that keep the visual shape of a line.
+
+    The first and last points are always kept. The points in between are split into threshold - 2 buckets,
+    and from each bucket the point forming the largest triangle with the previously kept point and the
+    average of the next bucket is kept.
+
+    Args:
+        x (np.ndarray): Increasing x positions.
+        y (np.ndarray): The values (no NaNs).
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Positions of the kept points, in order.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the triangle area (the factor doesn't change the argmax)
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        kept[i + 1] = a
+    kept[-1] = n - 1
+    return kept
+
+def minmax_indices(y: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Keeps the minimum and maximum of each of `buckets` equal-sized buckets (plus the first and last point),
+    so peaks survive exactly. Returns at most 2 * buckets + 2 positions, in order.
+    """
+    n = len(y)
+    if buckets < 1 or 2 * buckets + 2 >= n:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lows = np.minimum.reduceat(y, starts)
+    highs = np.maximum.reduceat(y, starts)
+    kept = [0, n - 1]
+    for start, end, low, high in zip(starts, edges[1:], lows, highs):
+        bucket = y[start:end]
+        kept.append(start + int(np.argmax(bucket == low)))
+        kept.append(start + int(np.argmax(bucket == high)))
+    return np.unique(kept)
+
+def downsample_series(series: pd.Series, max_points: int = MAX_POINTS, method: str = 'lttb') -> pd.Series:
+    """
+    Returns a series reduced to about max_points points ('lttb' or 'minmax'), dropping NaNs.
+    Series that are already short enough are returned without the NaNs only.
+    """
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    y = series.to_numpy(dtype=np.float64)
+    if method == 'minmax':
+        kept = minmax_indices(y, max(1, (max_points - 2) // 2))
+    else:
+        kept = lttb_indices(_positions(series.index), y, max_points)
+    return series.iloc[kept]
+
+def top_keywords(iot_df: pd.DataFrame, k: int, by: str = 'mean') -> list[str]:
+    """
+    Returns the k keywords with the highest 'mean', 'peak' (max) or 'latest' (last non-NaN) interest.
+    """
+    columns = iot_df.drop(columns=['isPartial'], errors='ignore')
+    if by == 'peak':
+        scores = columns.max()
+    elif by == 'latest':
+        scores = columns.ffill().iloc[-1] if len(columns) else columns.max()
+    else:
+        scores = columns.mean()
+    return scores.sort_values(ascending=False, kind='stable').index[:k].tolist()
+
+def page_keywords(keywords: list[str], page: int, page_size: int) -> list[str]:
+    """
+    Returns one page (0-based) of a keyword list.
+    """
+    return keywords[page * page_size:(page + 1) * page_size]
+
+def page_count(keywords: list[str], page_size: int) -> int:
+    return max(1, -(-len(keywords) // page_size))
+
+class SeriesDownsampler:
+    """
+    Memoizes downsampled series by (keyword, content hash, max_points, method), so a chart that is redrawn
+    with mostly the same data (e.g. while a job adds keywords, or when paging back) only recomputes the series
+    that changed. Least recently used entries are dropped beyond max_entries.
+    """
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def downsample(self, keyword: str, series: pd.Series, max_points: int = MAX_POINTS,
+                   method: str = 'lttb') -> pd.Series:
+        """
+        Returns downsample_series(series, max_points, method), computed once per distinct series.
+        """
+        digest = int(pd.util.hash_pandas_object(series, index=True).sum())
+        key = (keyword, digest, len(series), max_points, method)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        reduced = downsample_series(series, max_points, method)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = reduced
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return reduced
+
+    def long_frame(self, iot_df: pd.DataFrame, keywords: list[str], max_points: int = MAX_POINTS,
+                   method: str = 'lttb') -> pd.DataFrame:
+        """
+        Builds a long (date, keyword, value) frame of the downsampled keywords, ready for a
+        colour-by-keyword line chart. Each keyword keeps its own points, so no NaN padding is sent.
+        """
+        frames = []
+        for keyword in keywords:
+            if keyword not in iot_df.columns:
+                continue
+            reduced = self.downsample(keyword, iot_df[keyword], max_points, method)
+            frames.append(pd.DataFrame({'date': reduced.index, 'keyword': keyword, 'value': reduced.to_numpy()}))
+        if not frames:
+            return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'keyword': pd.Series(dtype=str),
+                                 'value': pd.Series(dtype=float)})
+        return pd.concat(frames, ignore_index=True)
+
+# Shared downsampler for the GUI and plot_iot
+downsampler = SeriesDownsampler()
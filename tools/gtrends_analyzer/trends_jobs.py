@@ -0,0 +1,227 @@
+# tools/gtrends_analyzer/trends_jobs.py
+# This module runs Google Trends fetches as background jobs, so a GUI can poll progress instead of blocking
+
+# import libraries
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from trends_tool import get_iot, get_rq, FetchScheduler, IOTAccumulator
+from trends_limiter import RateLimiter
+
+# Process-wide cap on requests per minute, shared by every job (sequential or parallel)
+JOB_REQUESTS_PER_MINUTE = 30.0
+# Finished jobs nobody collected (e.g. the browser tab was closed) are dropped after this many seconds
+FINISHED_JOB_TTL = 3600.0
+
+# Job states
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = 'queued', 'running', 'done', 'cancelled', 'failed'
+
+class FetchJob:
+    """
+    One IOT and/or RQ fetch for a keyword list, run on a background thread by a JobRunner.
+
+    Keywords are fetched a few at a time (one per session), and cancel() is honoured between those
+    chunks. Finished keywords are collected as they arrive, so snapshot() can show partial results
+    while the job is still running (and a cancelled job keeps what it already fetched).
+    """
+    def __init__(self, keywords: list[str], mode: str, timeframe: str, workers: int = 1, refresh: bool = False):
+        """
+        Args:
+            keywords (list[str]): The keywords to fetch.
+            mode (str): 'Both', 'Interest Over Time Only' or 'Related Queries Only' (the GUI's analysis modes).
+            timeframe (str): The pytrends timeframe string.
+            workers (int): Number of parallel sessions (see FetchScheduler).
+            refresh (bool): Ignore cached responses for this job only (other sessions keep using the caches).
+        """
+        self.id = uuid.uuid4().hex
+        self.keywords = keywords
+        self.mode = mode
+        self.timeframe = timeframe
+        self.workers = max(1, workers)
+        self.refresh = refresh
+        self.limiter = None     # Process-wide parent limiter, set by JobRunner.submit()
+        self.fetch_iot = mode in ['Both', 'Interest Over Time Only']
+        self.fetch_rq = mode in ['Both', 'Related Queries Only']
+
+        self.state = QUEUED
+        self.phase = None       # 'IOT' or 'RQ' while running
+        self.error = None
+        self.total = len(keywords) * (self.fetch_iot + self.fetch_rq)
+        self.done = 0           # Keywords finished (fetched or skipped) across both phases
+        self.started_at = None
+        self.finished_at = None
+
+        self._iot = IOTAccumulator()
+        self._rq = {}
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    # --- Called from the job thread ---
+    def run(self):
+        """
+        Fetches every keyword (runs on the runner's thread).
+        """
+        if self._cancel.is_set():
+            # Cancelled while queued; finished_at lets the runner expire it like any other finished job
+            self.state = CANCELLED
+            self.finished_at = time.monotonic()
+            return
+        self.state = RUNNING
+        self.started_at = time.monotonic()
+        # Every job (even a single-session one) goes through a scheduler chained to the runner's
+        # process-wide limiter, so all jobs together stay under one requests-per-minute cap
+        scheduler = FetchScheduler(self.workers, parent=self.limiter)
+        # One keyword per session per step, so cancel takes effect after at most one request each
+        step = self.workers
+
+        try:
+            if self.fetch_iot:
+                self.phase = 'IOT'
+                for i in range(0, len(self.keywords), step):
+                    if self._cancel.is_set():
+                        break
+                    get_iot(self.keywords[i:i + step], timeframe=self.timeframe, scheduler=scheduler,
+                            on_result=self._add_iot, refresh=self.refresh)
+                    self._advance(len(self.keywords[i:i + step]))
+
+            if self.fetch_rq:
+                self.phase = 'RQ'
+                for i in range(0, len(self.keywords), step):
+                    if self._cancel.is_set():
+                        break
+                    get_rq(self.keywords[i:i + step], timeframe=self.timeframe, scheduler=scheduler,
+                           on_result=self._add_rq, refresh=self.refresh)
+                    self._advance(len(self.keywords[i:i + step]))
+
+        except Exception as e:
+            print(f"Fetch job {self.id} failed: {e}")
+            self.error = str(e)
+            self.state = FAILED
+        else:
+            self.state = CANCELLED if self._cancel.is_set() else DONE
+        finally:
+            self.phase = None
+            self.finished_at = time.monotonic()
+
+    def _add_iot(self, keyword: str, series: pd.Series):
+        with self._lock:
+            self._iot.add(keyword, series)
+
+    def _add_rq(self, keyword: str, rq: dict):
+        with self._lock:
+            self._rq[keyword] = rq
+
+    def _advance(self, count: int):
+        with self._lock:
+            self.done += count
+
+    # --- Called from the GUI ---
+    def cancel(self):
+        """
+        Asks the job to stop after the keywords currently in flight.
+        """
+        self._cancel.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, CANCELLED, FAILED)
+
+    def progress(self) -> dict:
+        """
+        Returns the job's progress: state, phase, done/total keywords, fraction, elapsed seconds and ETA in seconds
+        (None until the first keyword has finished).
+        """
+        with self._lock:
+            done = self.done
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        eta = None
+        if done and not self.finished:
+            eta = elapsed / done * (self.total - done)
+        return {
+            'state': self.state,
+            'phase': self.phase,
+            'done': done,
+            'total': self.total,
+            'fraction': done / self.total if self.total else 1.0,
+            'elapsed': elapsed,
+            'eta': eta,
+        }
+
+    def snapshot(self) -> tuple[pd.DataFrame | None, dict | None]:
+        """
+        Returns the results collected so far as (wide IOT DataFrame or None, RQ dict or None).
+        """
+        with self._lock:
+            iot_df = self._iot.to_frame()
+            rq_data = dict(self._rq)
+        return iot_df, (rq_data if rq_data else None)
+
+class JobRunner:
+    """
+    Process-wide pool of background fetch jobs, shared by every GUI session.
+
+    Each session only keeps the id of its own job and polls it; the fetches themselves run here,
+    so a long run never holds up a session's script thread (or anyone else's page).
+    Jobs beyond max_jobs wait in the 'queued' state. Every job's sessions are chained to one shared
+    limiter, so all analysts together stay under requests_per_minute however many jobs are running.
+    Finished jobs that are never collected are evicted finished_ttl seconds after they end.
+    """
+    def __init__(self, max_jobs: int = 4, requests_per_minute: float = JOB_REQUESTS_PER_MINUTE,
+                 finished_ttl: float = FINISHED_JOB_TTL):
+        cap_interval = 60 / requests_per_minute
+        self.limiter = RateLimiter(initial_interval=cap_interval, min_interval=cap_interval, jitter=0)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_jobs), thread_name_prefix="trends-job")
+        self.finished_ttl = finished_ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _evict_expired(self):
+        """
+        Drops finished jobs older than finished_ttl (caller holds the lock).
+        """
+        cutoff = time.monotonic() - self.finished_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, job: FetchJob) -> str:
+        """
+        Starts (or queues) a job and returns its id.
+        """
+        job.limiter = self.limiter
+        with self._lock:
+            self._evict_expired()
+            self._jobs[job.id] = job
+        self._executor.submit(job.run)
+        return job.id
+
+    def get(self, job_id: str | None) -> FetchJob | None:
+        """
+        Returns the job with the given id, or None if it is unknown (e.g. already collected or expired).
+        """
+        with self._lock:
+            self._evict_expired()
+            return self._jobs.get(job_id)
+
+    def forget(self, job_id: str | None):
+        """
+        Drops a job once its session has collected the results (cancelling it if it is still running).
+        """
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None and not job.finished:
+            job.cancel()
+
+    def active(self) -> int:
+        """
+        Returns the number of queued or running jobs.
+        """
+        with self._lock:
+            self._evict_expired()
+            return sum(not job.finished for job in self._jobs.values())
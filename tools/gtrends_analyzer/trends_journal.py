@@ -0,0 +1,132 @@
+# tools/gtrends_analyzer/trends_journal.py
+# This module provides a run journal so long batch runs can be checkpointed and resumed
+
+# import libraries
+import os
+import json
+import threading
+import pandas as pd
+
+class RunJournal:
+    """
+    Append-only journal of per-keyword results for one batch run, stored in a checkpoint directory.
+
+    Files:
+        run.json       - The run parameters (timeframe, batch mode, anchor, ...), checked on resume.
+        journal.jsonl  - One JSON line per finished keyword, appended and flushed as soon as it arrives
+                         (plus, in batched runs, the reference anchor series defining the shared scale).
+
+    A crash can at worst leave a truncated last line, which is ignored on load.
+    """
+    def __init__(self, checkpoint_dir: str):
+        self.checkpoint_dir = checkpoint_dir
+        self.params_path = os.path.join(checkpoint_dir, "run.json")
+        self.journal_path = os.path.join(checkpoint_dir, "journal.jsonl")
+        self._lock = threading.Lock()   # Results can arrive from several scheduler threads
+
+    def exists(self) -> bool:
+        """
+        Returns True if the checkpoint directory already holds a journal.
+        """
+        return os.path.exists(self.params_path)
+
+    def start(self, params: dict):
+        """
+        Starts a new journal (overwriting any previous one) with the given run parameters.
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        with open(self.params_path, 'w', encoding='utf-8') as f:
+            json.dump(params, f, indent=2)
+        open(self.journal_path, 'w', encoding='utf-8').close()
+
+    def load(self) -> tuple[dict, dict[str, pd.Series], dict[str, dict]]:
+        """
+        Loads the run parameters and every finished keyword from the journal.
+
+        Returns:
+            tuple: (params, iot results keyed by keyword, rq results keyed by keyword)
+        """
+        with open(self.params_path, encoding='utf-8') as f:
+            params = json.load(f)
+
+        iot, rq = {}, {}
+        for record in self._records():
+            if record['kind'] == 'iot':
+                iot[record['keyword']] = _series_from_record(record)
+            elif record['kind'] == 'rq':
+                rq[record['keyword']] = {part: _frame_from_record(record[part]) for part in ('top', 'rising')}
+        return params, iot, rq
+
+    def load_reference(self) -> pd.Series | None:
+        """
+        Returns the journaled reference anchor series of a batched run, or None if none was journaled.
+        """
+        reference = None
+        for record in self._records():
+            if record['kind'] == 'reference':
+                reference = _series_from_record(record)
+        return reference
+
+    def _records(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial line from an interrupted write
+                    continue
+
+    def _append(self, record: dict):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_iot(self, keyword: str, series: pd.Series):
+        """
+        Journals one keyword's IOT series.
+        """
+        self._append({'kind': 'iot', **_series_to_record(keyword, series)})
+
+    def record_reference(self, anchor: str, series: pd.Series):
+        """
+        Journals the anchor series that a batched run rescales against (see get_iot's on_reference),
+        so a resumed run stays on the same scale even when the anchor isn't one of the keywords.
+        """
+        self._append({'kind': 'reference', **_series_to_record(anchor, series)})
+
+    def record_rq(self, keyword: str, rq: dict):
+        """
+        Journals one keyword's related queries ({'top': DataFrame | None, 'rising': DataFrame | None}).
+        """
+        self._append({
+            'kind': 'rq',
+            'keyword': keyword,
+            'top': _frame_to_record(rq.get('top')),
+            'rising': _frame_to_record(rq.get('rising')),
+        })
+
+def _series_to_record(keyword: str, series: pd.Series) -> dict:
+    return {
+        'keyword': keyword,
+        'index': [ts.isoformat() for ts in series.index],
+        'values': series.tolist(),
+    }
+
+def _series_from_record(record: dict) -> pd.Series:
+    index = pd.DatetimeIndex(record['index'], name='date')
+    return pd.Series(record['values'], index=index, name=record['keyword'])
+
+def _frame_to_record(df: pd.DataFrame | None) -> dict | None:
+    if df is None:
+        return None
+    return json.loads(df.to_json(orient='split', index=False))
+
+def _frame_from_record(record: dict | None) -> pd.DataFrame | None:
+    if record is None:
+        return None
+    return pd.DataFrame(record['data'], columns=record['columns'])
@@ -0,0 +1,195 @@
+# tools/gtrends_analyzer/trends_limiter.py
+# This module provides an adaptive rate limiter for Google Trends requests
+
+# import libraries
+import time
+import random
+import threading
+
+class RateLimiter:
+    """
+    Token bucket whose refill interval adapts to how Google is responding (AIMD).
+
+    Every request takes one token; tokens refill at one per `interval` seconds, up to `burst`.
+    A 429 multiplies the interval by `backoff_factor` (up to `max_interval`) and drains the bucket,
+    and every success multiplies it by `recovery_factor` (down to `min_interval`), so the
+    interval shrinks back exponentially once Google stops throttling.
+
+    A limiter can have a `parent` (e.g. a global requests-per-minute cap shared by several sessions):
+    acquire() then also waits for a parent token, and 429s/successes are reported to the parent too.
+
+    The clock and sleep functions can be swapped for fakes in tests.
+    """
+    def __init__(self, initial_interval: float = 20.0, min_interval: float = 5.0, max_interval: float = 300.0,
+                 burst: int = 1, backoff_factor: float = 2.0, recovery_factor: float = 0.8, jitter: float = 0.25,
+                 clock=time.monotonic, sleep=time.sleep, parent: 'RateLimiter | None' = None):
+        """
+        Args:
+            initial_interval (float): Seconds between requests at start-up.
+            min_interval (float): Fastest allowed interval (healthy periods).
+            max_interval (float): Slowest allowed interval (heavy throttling).
+            burst (int): Bucket capacity, i.e. how many requests may go out back to back.
+            backoff_factor (float): Interval multiplier applied on a 429.
+            recovery_factor (float): Interval multiplier applied on a success.
+            jitter (float): Random extra wait, as a fraction of each wait, so requests don't look robotic.
+            clock (callable): Returns the current time in seconds.
+            sleep (callable): Sleeps for the given number of seconds.
+            parent (RateLimiter | None): Shared limiter that every request must also pass.
+        """
+        self.interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.burst = burst
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.jitter = jitter
+        self.clock = clock
+        self.sleep = sleep
+        self.parent = parent
+
+        # Start with one token so the first request goes out immediately
+        self.tokens = 1.0
+        self.last_refill = clock()
+        self.backoff_level = 0      # Consecutive 429s since the last success
+        self.successes = 0
+        self.throttled = 0
+        self.waited = 0.0           # Total seconds spent waiting for tokens
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) / self.interval)
+        self.last_refill = now
+
+    def acquire(self) -> float:
+        """
+        Blocks until a token is available and takes it.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                # Small tolerance so float rounding can't leave us waiting on a sliver of a token
+                if self.tokens >= 1 - 1e-9:
+                    self.tokens = max(0.0, self.tokens - 1)
+                    self.waited += waited
+                    break
+                wait = (1 - self.tokens) * self.interval
+            wait += random.uniform(0, self.jitter * wait)
+            self.sleep(wait)
+            waited += wait
+
+        # Then wait for the shared budget, if any
+        if self.parent is not None:
+            waited += self.parent.acquire()
+        return waited
+
+    def record_success(self):
+        """
+        Shrinks the interval after a successful request.
+        """
+        with self._lock:
+            self._refill()
+            self.interval = max(self.min_interval, self.interval * self.recovery_factor)
+            self.backoff_level = 0
+            self.successes += 1
+        if self.parent is not None:
+            self.parent.record_success()
+
+    def record_throttle(self):
+        """
+        Widens the interval and drains the bucket after a 429 response.
+        """
+        with self._lock:
+            self._refill()
+            self.interval = min(self.max_interval, self.interval * self.backoff_factor)
+            self.tokens = 0.0
+            self.backoff_level += 1
+            self.throttled += 1
+        if self.parent is not None:
+            self.parent.record_throttle()
+
+    def metrics(self) -> dict:
+        """
+        Returns the current rate and backoff state.
+        """
+        with self._lock:
+            self._refill()
+            return {
+                'rate_per_minute': round(60 / self.interval, 2),
+                'interval': round(self.interval, 2),
+                'tokens': round(self.tokens, 2),
+                'backoff_level': self.backoff_level,
+                'successes': self.successes,
+                'throttled': self.throttled,
+                'waited': round(self.waited, 1),
+            }
+
+def is_rate_limited(error: Exception) -> bool:
+    """
+    Returns True if an exception raised by pytrends/requests is a 429 (Too Many Requests).
+    """
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    return '429' in str(error)
+
+# TEST BLOCK
+if __name__ == "__main__":
+    # Drives a limiter through throttling and recovery on a fake clock (no real waiting)
+    class FakeClock:
+        def __init__(self):
+            self.now = 0.0
+
+        def __call__(self) -> float:
+            return self.now
+
+        def sleep(self, seconds: float):
+            self.now += seconds
+
+    clock = FakeClock()
+    limiter = RateLimiter(initial_interval=20, min_interval=5, max_interval=300, jitter=0,
+                          clock=clock, sleep=clock.sleep)
+
+    print("--- Start-up ---")
+    assert limiter.acquire() == 0, "first request should go out immediately"
+    assert limiter.acquire() == 20, "second request should wait one interval"
+    print(f"{limiter.metrics()}\n")
+
+    print("--- Throttling: 429, 429, 429 ---")
+    for expected in (40, 80, 160):
+        limiter.record_throttle()
+        assert limiter.interval == expected and limiter.tokens == 0
+    assert limiter.backoff_level == 3
+    assert limiter.acquire() == 160, "a drained bucket should wait the widened interval"
+    limiter.record_throttle()
+    assert limiter.interval == 300, "interval should stop at max_interval"
+    print(f"{limiter.metrics()}\n")
+
+    print("--- Recovery: successes until min_interval ---")
+    successes = 0
+    while limiter.interval > limiter.min_interval:
+        limiter.acquire()
+        limiter.record_success()
+        successes += 1
+    assert limiter.interval == 5 and limiter.backoff_level == 0
+    assert successes == 19, successes     # 300 * 0.8^19 < 5, so the 19th success hits the floor
+    clock.sleep(5)      # Idle for one interval refills one token (burst=1 caps it there)
+    assert limiter.acquire() == 0 and limiter.acquire() == 5
+    print(f"Recovered after {successes} successes, {clock.now:.0f} s on the fake clock: {limiter.metrics()}\n")
+
+    print("--- Parent cap: a session's 429 also slows the shared cap ---")
+    parent = RateLimiter(initial_interval=2, min_interval=2, jitter=0, clock=clock, sleep=clock.sleep)
+    child = RateLimiter(initial_interval=1, min_interval=1, jitter=0, clock=clock, sleep=clock.sleep, parent=parent)
+    child.acquire()
+    assert child.acquire() == 1 + 1, "child waits its own interval, then the rest of the parent's"
+    child.record_throttle()
+    assert child.interval == 2 and parent.interval == 4 and parent.throttled == 1
+    print(f"child {child.metrics()}\nparent {parent.metrics()}\n")
+
+    assert is_rate_limited(Exception("The request failed: Google returned a response with code 429"))
+    assert not is_rate_limited(Exception("The request failed: Google returned a response with code 500"))
+    print("--- Test Complete ---")
@@ -3,33 +3,27 @@
 # import libraries
 import os
 import datetime
-import matplotlib.pyplot as plt
 import pandas as pd
-from trends_tool import get_iot, get_rq
+from trends_tool import get_iot, get_rq, IOTAccumulator, FetchScheduler
+from trends_sinks import open_sink, SINKS, iot_to_table, rq_to_table, write_parquet
+from trends_charts import top_keywords
+from trends_render import render_line_chart
 
-def plot_iot(df, keywords, filename):
+def plot_iot(df, keywords, filename, top_k: int | None = 20, max_points: int | None = None):
     """
     Plots the Interest Over Time DataFrame and saves it to a file.
+    With more than top_k keywords only the top_k by mean interest are drawn, and each line is reduced
+    to about one min/max pair per horizontal pixel, so long 'all' timeframes render quickly.
+    Rendering is headless (Agg) and the figure is released once saved (see trends_render).
     """
-    # Create MPL figure (width, height [in inches])
-    plt.figure(figsize=(12, 6))
-
-    # Plot each keyword's trend line
-    for keyword in keywords:
-        if keyword in df.columns:
-            plt.plot(df.index, df[keyword], label=keyword)
-
-    # Add titles and labels for clarity
-    plt.title("Google Trends: Interest Over Time")
-    plt.xlabel("Date")
-    plt.ylabel("Relative Interest")
-    plt.grid(True)
-    plt.legend()
-    plt.tight_layout()  # Adjusts the plot layout to prevent label overlapping
-    
-    # Save the plot to the specified file
-    plt.savefig(filename)
-    print(f"Chart saved successfully to '{filename}'\n")
+    # Keep the legend readable for long keyword lists
+    keywords = [keyword for keyword in keywords if keyword in df.columns]
+    if top_k is not None and len(keywords) > top_k:
+        keywords = top_keywords(df[keywords], top_k)
+        print(f"Plotting the top {top_k} of {len(df.columns)} keywords by mean interest.")
+
+    seconds = render_line_chart(df, keywords, filename, max_points=max_points)
+    print(f"Chart saved successfully to '{filename}' ({seconds:.2f} s)\n")
 
 def chunk_keywords(keywords: list[str], chunk_size: int = 5) -> list[list[str]]:
     """
@@ -78,39 +72,62 @@ def main():
     print("")
     if not timeframe: timeframe = 'today 12-m'
 
+    # Optional parallel sessions (all sessions share one global requests-per-minute cap)
+    workers_input = input("Enter number of parallel sessions (Default is 1): ").strip()
+    print("")
+    workers = int(workers_input) if workers_input.isdigit() else 1
+    scheduler = FetchScheduler(workers) if workers > 1 else None
+
+    # Optional streaming output, so partial results are on disk while the run is in progress
+    stream_format = input(f"Stream results to disk as they arrive? Enter {', '.join(SINKS)} (Default is no): ").strip().lower()
+    print("")
+    if stream_format and stream_format not in SINKS:
+        print(f"Unknown format '{stream_format}', results will not be streamed.\n")
+        stream_format = ''
+
     # Initialize data variables
     iot_data = None
     rq_data = None
-    all_iot_data = pd.DataFrame()
+    all_iot_data = IOTAccumulator()
     output_dir = os.path.join("..", "..", "downloads", "gtrends_reports")
     os.makedirs(output_dir, exist_ok=True)
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    # Fetch data based on selected modality
-    if mode_choice in ['1', '3']:
-        print("--- Starting Interest Over Time Batch Processing ---\n")
-        # Break keywords into chunks of 5 or less
-        keyword_chunks = chunk_keywords(keywords)
-        print(f"Found {len(keywords)} keywords, processing in {len(keyword_chunks)} batches.\n")
-
-        for i, chunk in enumerate(keyword_chunks):
-            print(f"Processing batch {i+1}/{len(keyword_chunks)}: {chunk}")
-            iot_chunk_data = get_iot(chunk, timeframe=timeframe)
-
-            if iot_chunk_data is not None:
-                if all_iot_data.empty:
-                    # Set empty DataFrame to first chunk data
-                    all_iot_data = iot_chunk_data
-                else:
-                    # Merge new chunk's data with the main DataFrame
-                    all_iot_data = all_iot_data.join(iot_chunk_data, how="outer")
-        
-        if not all_iot_data.empty: iot_data = all_iot_data
-
-    if mode_choice in ['2', '3']:
-        print("--- Starting Related Queries Batch Processing ---\n")
-        # Pass full list since get_rq already processes one keyword at a time
-        rq_data = get_rq(keywords, timeframe=timeframe)
+    sink = None
+    try:
+        if stream_format:
+            sink = open_sink(stream_format, output_dir, timestamp, timeframe)
+
+        # Fetch data based on selected modality
+        if mode_choice in ['1', '3']:
+            print("--- Starting Interest Over Time Batch Processing ---\n")
+            # Break keywords into chunks of 5 or less (parallel mode splits the work internally)
+            keyword_chunks = [keywords] if scheduler else chunk_keywords(keywords)
+            print(f"Found {len(keywords)} keywords, processing in {len(keyword_chunks)} batches.\n")
+
+            for i, chunk in enumerate(keyword_chunks):
+                print(f"Processing batch {i+1}/{len(keyword_chunks)}: {chunk}")
+                iot_chunk_data = get_iot(chunk, timeframe=timeframe, scheduler=scheduler,
+                                         on_result=sink.write_iot if sink else None)
+
+                # Collect the chunk's columns, merged into one DataFrame after the last chunk
+                all_iot_data.add_frame(iot_chunk_data)
+
+            iot_data = all_iot_data.to_frame()
+
+        if mode_choice in ['2', '3']:
+            print("--- Starting Related Queries Batch Processing ---\n")
+            # Pass full list since get_rq already processes one keyword at a time
+            rq_data = get_rq(keywords, timeframe=timeframe, scheduler=scheduler,
+                             on_result=sink.write_rq if sink else None)
+    finally:
+        # Close the sink even if the run fails or is interrupted, so buffered rows and Parquet footers are written
+        if sink:
+            sink.close()
+
+    if sink:
+        for path in sink.written_paths():
+            print(f"Streamed results to '{path}'")
+        print("")
 
     # Output 1: CSV export
     # IOT data
@@ -169,6 +186,20 @@ def main():
                 print(f"- Saved rising queries for '{keyword}' to '{rising_filename}'\n")
         """
     
+    # Output 1b: Optional long-format Parquet export
+    if iot_data is not None or rq_data:
+        parquet_choice = input("Also save the results as long-format Parquet files? (y/n): ").strip().lower()
+        print("")
+        if parquet_choice == 'y':
+            if iot_data is not None:
+                iot_parquet = os.path.join(output_dir, f"iot_data_{timestamp}.parquet")
+                write_parquet(iot_to_table(iot_data, timeframe), iot_parquet)
+                print(f"Saved Interest Over Time data to '{iot_parquet}'\n")
+            if rq_data:
+                rq_parquet = os.path.join(output_dir, f"rq_data_{timestamp}.parquet")
+                write_parquet(rq_to_table(rq_data, timeframe), rq_parquet)
+                print(f"Saved Related Queries data to '{rq_parquet}'\n")
+
     # Output 2: Optional Plotting
     if iot_data is not None:
         plot_choice = input("Generate a plot of the IOT data? (y/n): ").strip().lower()
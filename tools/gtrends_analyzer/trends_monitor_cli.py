@@ -5,7 +5,11 @@ import os
 import datetime
 import argparse
 import pandas as pd
-from trends_tool import get_iot, get_rq
+from trends_tool import get_iot, get_rq, refresh_iot, IOTAccumulator, response_cache, rate_limiter, FetchScheduler
+from trends_journal import RunJournal
+from trends_sinks import open_sink, SINKS, iot_to_table, rq_to_table, write_parquet
+from trends_charts import top_keywords
+from trends_render import ChartRenderer, render_line_chart, print_render_summary
 
 def chunk_keywords(keywords: list[str], chunk_size: int = 5) -> list[list[str]]:
     """
@@ -13,13 +17,44 @@ def chunk_keywords(keywords: list[str], chunk_size: int = 5) -> list[list[str]]:
     """
     return [keywords[i:i + chunk_size] for i in range(0, len(keywords), chunk_size)]
 
+def combine_callbacks(*callbacks):
+    """
+    Combines several on_result(keyword, result) callbacks into one, skipping any that are None.
+    """
+    callbacks = [callback for callback in callbacks if callback is not None]
+    if not callbacks:
+        return None
+
+    def on_result(keyword, result):
+        for callback in callbacks:
+            callback(keyword, result)
+    return on_result
+
+def print_rq_report(rq_data: dict):
+    """
+    Prints the top and rising related queries for each keyword.
+    """
+    for keyword, data in rq_data.items():
+        print(f"--- For keyword: '{keyword}' ---\n")
+        if data.get('top') is not None:
+            print("--- Top Related Queries ---")
+            print(f"{data.get('top').to_string()}\n")
+        else:
+            print("No top queries data found.\n")
+
+        if data.get('rising') is not None:
+            print("--- Rising Related Queries---")
+            print(f"{data.get('rising').to_string()}\n")
+        else:
+            print("No rising queries data found.\n")
+
 def main():
     """
     Main function to run the Google Trends Analyzer with CLI arguments.
     """
     # Argument Parser Setup
     parser = argparse.ArgumentParser(description="A tool to analyze Google Trends data for market research.")
-    parser.add_argument('-k', '--keywords', nargs='+', required=True, help="List of keywords to analyze.")
+    parser.add_argument('-k', '--keywords', nargs='+', help="List of keywords to analyze.")
     parser.add_argument('-m', '--mode', type = str, default = 'both', choices=['iot', 'rq', 'both'], 
                         help="The analysis mode to run.")
     parser.add_argument('-t', '--timeframe', type = str, default = 'today 12-m', 
@@ -34,13 +69,61 @@ def main():
            * Hourly (only works for 1 or 4 hours) (e.g. past 4 hours is 'now 4-H')
     """
     parser.add_argument('--report', action="store_true", help="Add this argument to print RQ console report.")
+    parser.add_argument('--batch', action="store_true",
+                        help="Send up to 5 keywords per IOT request, rescaled to a shared anchor keyword.")
+    parser.add_argument('--anchor', type = str, default = None,
+                        help="Anchor keyword for --batch mode (defaults to the first keyword).")
+    parser.add_argument('--no-cache', action="store_true", help="Don't read or write the local response cache.")
+    parser.add_argument('--refresh', action="store_true",
+                        help="Ignore cached responses and refetch everything (results are still cached).")
+    parser.add_argument('-w', '--workers', type = int, default = 1,
+                        help="Number of parallel Google Trends sessions (default is 1, i.e. sequential).")
+    parser.add_argument('--rpm', type = float, default = 30.0,
+                        help="Global cap on requests per minute across all parallel sessions.")
+    parser.add_argument('--checkpoint', type = str, default = None, metavar = 'DIR',
+                        help="Journal every keyword's result to DIR as soon as it arrives.")
+    parser.add_argument('--resume', action="store_true",
+                        help="Resume the run journaled in --checkpoint DIR, skipping keywords that already finished.")
+    parser.add_argument('--update', type = str, default = None, metavar = 'FILE',
+                        help="Incrementally refresh a saved iot_data CSV in place (fetches only the recent tail). "
+                             "Keywords default to the file's columns.")
+    parser.add_argument('--stream', type = str, default = None, choices = list(SINKS),
+                        help="Append each keyword's results to long-format files as soon as they arrive, "
+                             "instead of collecting everything for end-of-run CSVs.")
+    parser.add_argument('--parquet', action="store_true",
+                        help="Also save IOT and RQ results as long-format Parquet files "
+                             "(keyword, date, value, timeframe, geo, fetched_at).")
+    parser.add_argument('--charts', type = str, default = None, choices = ['combined', 'grid', 'keywords', 'all'],
+                        help="Render IOT charts: one combined chart (top 20 keywords), small-multiple grid pages, "
+                             "one chart per keyword, or all of them.")
+    parser.add_argument('--chart-format', type = str, nargs = '+', default = ['png'], choices = ['png', 'svg', 'pdf'],
+                        help="File format(s) for --charts (default is png).")
+    parser.add_argument('--chart-workers', type = int, default = None,
+                        help="Number of processes rendering --charts (default is the CPU count).")
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint DIR")
+
+    # Stored IOT series to refresh incrementally
+    stored_iot = None
+    if args.update:
+        stored_iot = pd.read_csv(args.update, index_col=0, parse_dates=True)
+        if not args.keywords:
+            args.keywords = list(stored_iot.columns)
+    if not args.keywords:
+        parser.error("the following arguments are required: -k/--keywords (unless --update FILE is given)")
 
     # Use parsed arguments as inputs
     keywords = args.keywords
     mode_choice = args.mode
     timeframe = args.timeframe
     console_report = args.report
+    batched = args.batch
+    anchor = args.anchor
+    response_cache.enabled = not args.no_cache
+    response_cache.refresh = args.refresh
+    # Parallel sessions share one global requests-per-minute cap
+    scheduler = FetchScheduler(args.workers, args.rpm) if args.workers > 1 else None
 
     # Begin Program
     print("\n--- Google Trends Market Analyzer ---\n")
@@ -55,97 +138,210 @@ def main():
     # Initialize data variables
     iot_data = None
     rq_data = None
-    all_iot_data = pd.DataFrame()
+    all_iot_data = IOTAccumulator()
     output_dir = os.path.join("..", "..", "downloads", "gtrends_reports")
     os.makedirs(output_dir, exist_ok=True)
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    # Fetch data based on selected modality
-    if mode_choice in ['iot', 'both']:
-        print("--- Starting Interest Over Time Batch Processing ---\n")
-        # Break keywords into chunks of 5 or less
-        keyword_chunks = chunk_keywords(keywords)
-        print(f"Found {len(keywords)} keywords, processing in {len(keyword_chunks)} batches.\n")
-
-        for i, chunk in enumerate(keyword_chunks):
-            print(f"Processing batch {i+1}/{len(keyword_chunks)}: {chunk}")
-            iot_chunk_data = get_iot(chunk, timeframe=timeframe)
-
-            if iot_chunk_data is not None:
-                if all_iot_data.empty:
-                    # Set empty DataFrame to first chunk data
-                    all_iot_data = iot_chunk_data
-                else:
-                    # Merge new chunk's data with the main DataFrame
-                    all_iot_data = all_iot_data.join(iot_chunk_data, how="outer")
-        
-        if not all_iot_data.empty: iot_data = all_iot_data
-
-    if mode_choice in ['rq', 'both']:
-        print("--- Starting Related Queries Batch Processing ---\n")
-        # Pass full list since get_rq already processes one keyword at a time
-        rq_data = get_rq(keywords, timeframe=timeframe)
-
-    # Output 1: CSV export
-    # IOT data
-    if iot_data is not None:
-        iot_filename = os.path.join(output_dir, f"iot_data_{timestamp}.csv")
-        iot_data.to_csv(iot_filename)
-        print(f"Saved Interest Over Time data to '{iot_filename}'\n")
-    
-    # RQ data
-    if rq_data:
-        print("Consolidating and saving Related Queries data to CSV...\n")
-
-        # Create empty lists to hold individual DataFrames
-        all_top_dfs = []
-        all_rising_dfs = []
-
-        # Loop through RQ data
-        for keyword, data in rq_data.items():
-            # 'Top' RQ data
-            top_df = data.get('top')
-            if top_df is not None:
-                # Add a column for the original keyword
-                top_df['Original Keyword'] = keyword
-                all_top_dfs.append(top_df)
-            
-            # 'Rising' RQ data
-            rising_df = data.get('rising')
-            if rising_df is not None:
-                # Add a column for the original keyword
-                rising_df['Original Keyword'] = keyword
-                all_rising_dfs.append(rising_df)
-
-        # Consolidate the lists into two master DataFrames
-        if all_top_dfs:
-            master_top_df = pd.concat(all_top_dfs, ignore_index=True)
-            top_filename = os.path.join(output_dir, f"rq_top_ALL_{timestamp}.csv")
-            master_top_df.to_csv(top_filename, index=False) # index=False is cleaner
-            print(f"- Saved all 'Top' queries to '{top_filename}'\n")
-
-        if all_rising_dfs:
-            master_rising_df = pd.concat(all_rising_dfs, ignore_index=True)
-            rising_filename = os.path.join(output_dir, f"rq_rising_ALL_{timestamp}.csv")
-            master_rising_df.to_csv(rising_filename, index=False)
-            print(f"- Saved all 'Rising' queries to '{rising_filename}'\n")
-
-    # Output 2: Console report for RQ
-    if rq_data and console_report:
-        print("--- Related Queries Report ---\n")
-        for keyword, data in rq_data.items():
-            print(f"--- For keyword: '{keyword}' ---\n")
-            if data.get('top') is not None:
-                print("--- Top Related Queries ---")
-                print(f"{data.get('top').to_string()}\n")
-            else:
-                print("No top queries data found.\n")
+    # Checkpointing: journal each keyword's result as it arrives, skip finished keywords on --resume
+    journal = None
+    done_iot, done_rq = {}, {}
+    journaled_reference = None
+    if args.checkpoint:
+        journal = RunJournal(args.checkpoint)
+        run_params = {'timeframe': timeframe, 'batch': batched, 'anchor': anchor}
+        if args.resume and journal.exists():
+            saved_params, done_iot, done_rq = journal.load()
+            if saved_params != run_params:
+                print(f"Checkpoint in '{args.checkpoint}' was made with {saved_params}, not {run_params}. Exiting.\n")
+                return
+            journaled_reference = journal.load_reference()
+            print(f"Resuming from '{args.checkpoint}': {len(done_iot)} IOT and {len(done_rq)} RQ keywords already done.\n")
+        elif journal.exists():
+            print(f"'{args.checkpoint}' already holds a checkpoint. Add --resume or choose another directory. Exiting.\n")
+            return
+        else:
+            journal.start(run_params)
+
+    # Streaming output: rows are written per keyword and nothing is kept for the end of the run
+    sink = None
+    try:
+        if args.stream:
+            sink = open_sink(args.stream, output_dir, timestamp, timeframe)
+            # Checkpointed keywords are written first so the stream files hold the complete run
+            for keyword, series in done_iot.items():
+                sink.write_iot(keyword, series)
+            for keyword, rq in done_rq.items():
+                sink.write_rq(keyword, rq)
+        on_iot = combine_callbacks(journal.record_iot if journal else None, sink.write_iot if sink else None)
+        on_rq = combine_callbacks(journal.record_rq if journal else None, sink.write_rq if sink else None)
+
+        # Fetch data based on selected modality
+        if mode_choice in ['iot', 'both'] and stored_iot is not None:
+            print("--- Starting Incremental Interest Over Time Refresh ---\n")
+            # Only keywords already in the stored file can be refreshed incrementally
+            iot_data = refresh_iot(stored_iot[[k for k in keywords if k in stored_iot.columns]], scheduler=scheduler)
+            if sink:
+                for keyword in iot_data.columns:
+                    sink.write_iot(keyword, iot_data[keyword])
+
+        elif mode_choice in ['iot', 'both']:
+            print("--- Starting Interest Over Time Batch Processing ---\n")
+            # Keywords already in the checkpoint are reused instead of refetched
+            iot_keywords = [k for k in keywords if k not in done_iot]
+            # In batched mode, rescale new payloads to the journaled anchor so both halves stay comparable
+            # (checkpoints from before reference journaling only have it if the anchor is one of the keywords)
+            batch_anchor = anchor or keywords[0]
+            reference = None
+            if batched:
+                reference = journaled_reference if journaled_reference is not None else done_iot.get(batch_anchor)
+                if reference is None and done_iot and iot_keywords:
+                    print(f"Checkpoint in '{args.checkpoint}' has {len(done_iot)} batched IOT keywords but no journaled "
+                          f"reference for anchor '{batch_anchor}', so new keywords can't be put on the same scale. "
+                          f"Start a new checkpoint instead. Exiting.\n")
+                    return
+
+            # Batched and parallel modes split the work internally, so pass the full list as one batch
+            # Otherwise break keywords into chunks of 5 or less
+            keyword_chunks = [iot_keywords] if batched or scheduler else chunk_keywords(iot_keywords)
+            print(f"Found {len(iot_keywords)} keywords, processing in {len(keyword_chunks)} batches.\n")
+
+            for i, chunk in enumerate(keyword_chunks):
+                if not chunk:
+                    continue
+                print(f"Processing batch {i+1}/{len(keyword_chunks)}: {chunk}")
+                iot_chunk_data = get_iot(chunk, timeframe=timeframe, batched=batched, anchor=batch_anchor, scheduler=scheduler,
+                                         reference=reference, on_result=on_iot,
+                                         on_reference=journal.record_reference if journal and batched else None)
+
+                # Collect the chunk's columns, merged into one DataFrame after the last chunk
+                # (streamed runs have already written them)
+                if not sink:
+                    all_iot_data.add_frame(iot_chunk_data)
 
-            if data.get('rising') is not None:
-                print("--- Rising Related Queries---")
-                print(f"{data.get('rising').to_string()}\n")
+            if not sink:
+                for keyword, series in done_iot.items():
+                    all_iot_data.add(keyword, series)
+
+            iot_data = all_iot_data.to_frame()
+            if iot_data is not None:
+                # Restore the original keyword order after merging in checkpointed keywords
+                iot_data = iot_data[[k for k in keywords if k in iot_data.columns]]
+
+        if mode_choice in ['rq', 'both']:
+            print("--- Starting Related Queries Batch Processing ---\n")
+            # Pass full list since get_rq already processes one keyword at a time
+            rq_keywords = [k for k in keywords if k not in done_rq]
+            if sink:
+                # Streamed runs fetch in chunks and only keep one chunk at a time (for the console report)
+                if console_report:
+                    print("--- Related Queries Report ---\n")
+                for chunk in chunk_keywords(rq_keywords, max(5, args.workers)):
+                    rq_chunk_data = get_rq(chunk, timeframe=timeframe, scheduler=scheduler, on_result=on_rq)
+                    if rq_chunk_data and console_report:
+                        print_rq_report(rq_chunk_data)
             else:
-                print("No rising queries data found.\n")
+                rq_data = get_rq(rq_keywords, timeframe=timeframe, scheduler=scheduler,
+                                 on_result=on_rq) if rq_keywords else None
+
+            # Merge in checkpointed keywords, in the original keyword order
+            if done_rq and not sink:
+                rq_data = {**done_rq, **(rq_data or {})}
+                rq_data = {k: rq_data[k] for k in keywords if k in rq_data}
+
+        # Output 1: CSV export
+        # IOT data
+        if iot_data is not None:
+            # Incremental refreshes update the stored file in place
+            iot_filename = args.update or os.path.join(output_dir, f"iot_data_{timestamp}.csv")
+            iot_data.to_csv(iot_filename)
+            print(f"Saved Interest Over Time data to '{iot_filename}'\n")
+
+        # RQ data
+        if rq_data:
+            print("Consolidating and saving Related Queries data to CSV...\n")
+
+            # Create empty lists to hold individual DataFrames
+            all_top_dfs = []
+            all_rising_dfs = []
+
+            # Loop through RQ data
+            for keyword, data in rq_data.items():
+                # 'Top' RQ data
+                top_df = data.get('top')
+                if top_df is not None:
+                    # Add a column for the original keyword
+                    top_df['Original Keyword'] = keyword
+                    all_top_dfs.append(top_df)
+
+                # 'Rising' RQ data
+                rising_df = data.get('rising')
+                if rising_df is not None:
+                    # Add a column for the original keyword
+                    rising_df['Original Keyword'] = keyword
+                    all_rising_dfs.append(rising_df)
+
+            # Consolidate the lists into two master DataFrames
+            if all_top_dfs:
+                master_top_df = pd.concat(all_top_dfs, ignore_index=True)
+                top_filename = os.path.join(output_dir, f"rq_top_ALL_{timestamp}.csv")
+                master_top_df.to_csv(top_filename, index=False) # index=False is cleaner
+                print(f"- Saved all 'Top' queries to '{top_filename}'\n")
+
+            if all_rising_dfs:
+                master_rising_df = pd.concat(all_rising_dfs, ignore_index=True)
+                rising_filename = os.path.join(output_dir, f"rq_rising_ALL_{timestamp}.csv")
+                master_rising_df.to_csv(rising_filename, index=False)
+                print(f"- Saved all 'Rising' queries to '{rising_filename}'\n")
+
+        # Output 1b: Long-format Parquet export
+        if args.parquet:
+            if iot_data is not None:
+                iot_parquet = os.path.join(output_dir, f"iot_data_{timestamp}.parquet")
+                write_parquet(iot_to_table(iot_data, timeframe), iot_parquet)
+                print(f"Saved Interest Over Time data to '{iot_parquet}'\n")
+            if rq_data:
+                rq_parquet = os.path.join(output_dir, f"rq_data_{timestamp}.parquet")
+                write_parquet(rq_to_table(rq_data, timeframe), rq_parquet)
+                print(f"Saved Related Queries data to '{rq_parquet}'\n")
+
+        # Output 1c: Charts (rendered headlessly on a process pool)
+        if args.charts and iot_data is not None:
+            chart_dir = os.path.join(output_dir, f"iot_charts_{timestamp}")
+            renderer = ChartRenderer(chart_dir, formats = tuple(args.chart_format), workers = args.chart_workers)
+            print(f"Rendering charts to '{chart_dir}'...\n")
+            if args.charts in ('combined', 'all'):
+                for fmt in renderer.formats:
+                    chart_filename = os.path.join(chart_dir, f"iot_chart.{fmt}")
+                    seconds = render_line_chart(iot_data, top_keywords(iot_data, 20), chart_filename)
+                    print(f"Saved combined chart to '{chart_filename}' ({seconds:.2f} s)\n")
+            if args.charts in ('grid', 'all'):
+                print_render_summary("grid pages", renderer.render_grid(iot_data))
+            if args.charts in ('keywords', 'all'):
+                print_render_summary("keyword charts", renderer.render_keywords(iot_data))
+        elif args.charts:
+            print("No IOT data to chart (IOT wasn't fetched, or results were only streamed).\n")
+
+        # Output 2: Console report for RQ
+        if rq_data and console_report:
+            print("--- Related Queries Report ---\n")
+            print_rq_report(rq_data)
+    finally:
+        # Close the sink even if the run fails or is interrupted, so buffered rows and Parquet footers are written
+        if sink:
+            sink.close()
+
+    # Streamed output files
+    if sink:
+        for path in sink.written_paths():
+            print(f"Streamed results to '{path}'")
+        print(f"({sink.rows_written} rows written)\n")
+
+    # Output 3: Request pacing summary
+    if scheduler:
+        print(f"Rate limiters: {scheduler.metrics()}\n")
+    else:
+        print(f"Rate limiter: {rate_limiter.metrics()}\n")
 
     print("--- Analysis Complete ---\n")
 
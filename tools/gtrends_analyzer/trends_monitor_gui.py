@@ -15,10 +15,14 @@
 
 # --- import libraries ---
 import os
+import hashlib
 import datetime
 import streamlit as st
 import pandas as pd
-from trends_tool import get_iot, get_rq
+from trends_tool import shared_cache
+from trends_jobs import FetchJob, JobRunner, DONE, CANCELLED
+from trends_sinks import iot_to_table, rq_to_table, parquet_bytes
+from trends_charts import downsampler, top_keywords, page_keywords, page_count
 from io import BytesIO
 
 # ==================================================
@@ -33,6 +37,16 @@ if 'rq_data' not in st.session_state:
     st.session_state.rq_data = None
 if 'last_keywords' not in st.session_state:
     st.session_state.last_keywords = None
+if 'last_timeframe' not in st.session_state:
+    st.session_state.last_timeframe = None
+if 'fetched_at' not in st.session_state:
+    st.session_state.fetched_at = None
+if 'data_fingerprint' not in st.session_state:
+    st.session_state.data_fingerprint = None
+if 'report_requested' not in st.session_state:
+    st.session_state.report_requested = None
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
 if 'keywords_input' not in st.session_state:
     st.session_state.keywords_input = "flare jeans, graphic tees, leather boots"
 
@@ -77,13 +91,11 @@ def save_to_xlsx(iot_df: pd.DataFrame | None, rq_data: dict | None) -> bytes:
                 # Top Related Queries
                 top_df = data.get('top')
                 if top_df is not None:
-                    top_df['Original Keyword'] = keyword
-                    all_top_dfs.append(top_df)
+                    all_top_dfs.append(top_df.assign(**{'Original Keyword': keyword}))
                 # Rising Related Queries
                 rising_df = data.get('rising')
                 if rising_df is not None:
-                    rising_df['Original Keyword'] = keyword
-                    all_rising_dfs.append(rising_df)
+                    all_rising_dfs.append(rising_df.assign(**{'Original Keyword': keyword}))
             if all_top_dfs:
                 master_top_df = pd.concat(all_top_dfs, ignore_index=True)
                 master_top_df.to_excel(writer, sheet_name='Top_Related_Queries', index=False)
@@ -96,54 +108,159 @@ def save_to_xlsx(iot_df: pd.DataFrame | None, rq_data: dict | None) -> bytes:
     return processed_data
 
 # --------------------------------------------------
-# Helper function for Data Retrieval
+# Helper functions for cached report downloads
 # --------------------------------------------------
-def fetch_data(keywords, mode_choice, selected_timeframe):
+def data_fingerprint(iot_df: pd.DataFrame | None, rq_data: dict | None, *extra) -> str:
     """
-    Handles data fetching process and updates session state.
-    NOTE: Use st.status for real-time, expandable feedback
+    Returns a content hash of the fetched results (plus any extra values, e.g. the timeframe).
+    Computed once per fetch and used as the cache key for report downloads.
     """
-    # --- Retrieve and process IOT Data ---
-    with st.status("Fetching Interest Over Time data...", expanded=True) as status_iot:
-        if mode_choice in ['Both', 'Interest Over Time Only']:
-            keyword_chunks = chunk_keywords(keywords)
-            if len(keyword_chunks) == 1:
-                st.write(f"Processing {len(keywords)} keyword(s)....")
-            else:
-                st.write(f"Processing {len(keywords)} keywords in {len(keyword_chunks)} batches....")
-            all_iot_data = pd.DataFrame()
-            for chunk in keyword_chunks:
-                iot_chunk_data = get_iot(chunk, timeframe=selected_timeframe)
-                if iot_chunk_data is not None:
-                    if all_iot_data.empty:
-                        all_iot_data = iot_chunk_data
-                    else:
-                        all_iot_data = all_iot_data.join(iot_chunk_data, how="outer")
-            if not all_iot_data.empty: 
-                st.session_state.iot_data = all_iot_data    # Store final DataFrame
-                status_iot.update(label="IOT data retrieval succeeded!", state="complete")
-            else:
-                st.session_state.iot_data = None
-                status_iot.update(label="IOT data retrieval failed.", state="error")
-        else:
-            st.session_state.iot_data = None
-            status_iot.update(label="IOT data skipped.", state="complete")
+    digest = hashlib.sha256()
+    if iot_df is not None:
+        digest.update(repr(list(iot_df.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(iot_df, index=True).values.tobytes())
+    for keyword, data in (rq_data or {}).items():
+        digest.update(keyword.encode('utf-8'))
+        for part in ('top', 'rising'):
+            part_df = data.get(part)
+            if part_df is not None:
+                digest.update(part.encode('utf-8'))
+                digest.update(pd.util.hash_pandas_object(part_df, index=False).values.tobytes())
+    for value in extra:
+        digest.update(repr(value).encode('utf-8'))
+    return digest.hexdigest()
 
-    # --- Retrieve and process RQ Data ---
-    with st.status("Fetching Related Queries data...", expanded=True) as status_rq:
-        if mode_choice in ['Both', 'Related Queries Only']:
-            st.write(f"Processing {len(keywords)} keyword(s)....")
-            st.session_state.rq_data = get_rq(keywords, timeframe=selected_timeframe)
-            if st.session_state.rq_data:
-                status_rq.update(label="RQ data retrieved succeeded!", state="complete")
-            else:
-                status_rq.update(label="RQ data retrieval failed.", state="error")
-        else:
-            st.session_state.rq_data = None
-            status_rq.update(label="RQ data skipped.", state="complete")
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_xlsx_report(fingerprint: str, _iot_df: pd.DataFrame | None, _rq_data: dict | None) -> bytes:
+    """
+    Builds the XLSX report once per data fingerprint (Streamlit skips hashing the underscore arguments).
+    """
+    return save_to_xlsx(_iot_df, _rq_data)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_parquet_report(fingerprint: str, kind: str, _iot_df: pd.DataFrame | None, _rq_data: dict | None,
+                         _timeframe: str, _fetched_at: datetime.datetime) -> bytes:
+    """
+    Builds the long-format IOT ('iot') or RQ ('rq') Parquet download once per data fingerprint.
+    """
+    if kind == 'iot':
+        return parquet_bytes(iot_to_table(_iot_df, _timeframe, fetched_at=_fetched_at))
+    return parquet_bytes(rq_to_table(_rq_data, _timeframe, fetched_at=_fetched_at))
+
+# --------------------------------------------------
+# Helper functions for Data Retrieval (background jobs)
+# --------------------------------------------------
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    """
+    Returns the job runner shared by every session of this server process.
+    """
+    return JobRunner()
+
+def format_seconds(seconds: float | None) -> str:
+    """
+    Formats a duration as 'Hh MMm', 'Mm SSs' or 'Ss' ('--' if unknown).
+    """
+    if seconds is None:
+        return "--"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+def collect_job_results(job: FetchJob):
+    """
+    Copies a finished job's results into session state (same keys the synchronous fetch used to fill).
+    """
+    iot_df, rq_data = job.snapshot()
+    st.session_state.iot_data = iot_df
+    st.session_state.rq_data = rq_data
+    st.session_state.data_fetched = True    # Flag that data has been collected
+    st.session_state.last_keywords = job.keywords   # Remember search keywords
+    st.session_state.last_timeframe = job.timeframe    # Recorded in the Parquet exports
+    st.session_state.fetched_at = datetime.datetime.now()
+    # Report downloads are cached against this fingerprint
+    st.session_state.data_fingerprint = data_fingerprint(iot_df, rq_data, job.timeframe, st.session_state.fetched_at)
 
-    st.session_state.data_fetched = True    # Flag that data has been successfully collected
-    st.session_state.last_keywords = keywords   # Remember search keywords
+@st.fragment(run_every=2)
+def show_fetch_job():
+    """
+    Polls this session's background job: progress, ETA, partial results and a cancel button.
+    Only this fragment reruns while the job is going, and the whole page reruns once it has finished.
+    """
+    runner = get_job_runner()
+    job = runner.get(st.session_state.job_id)
+    if job is None:
+        # Unknown job (expired or forgotten elsewhere): stop polling it, or this fragment reruns forever
+        st.session_state.job_id = None
+        st.session_state.job_outcome = ('expired', "the job is no longer available, please run it again.")
+        st.rerun()
+
+    if job.finished:
+        collect_job_results(job)
+        runner.forget(job.id)
+        st.session_state.job_id = None
+        st.session_state.job_outcome = (job.state, job.error)
+        st.rerun()
+
+    progress = job.progress()
+    if progress['state'] == 'queued':
+        label = f"Queued behind {runner.active() - 1} other job(s)..."
+    else:
+        label = (f"Fetching {progress['phase']} data: {progress['done']}/{progress['total']} keywords "
+                 f"(elapsed {format_seconds(progress['elapsed'])}, ETA {format_seconds(progress['eta'])})")
+    st.progress(progress['fraction'], text=label)
+
+    if st.button("Cancel", key='cancel_job'):
+        job.cancel()
+        st.info("Cancelling after the keywords in flight...")
+
+    # --- Partial results, as keywords finish (top keywords only, downsampled)
+    iot_df, rq_data = job.snapshot()
+    if iot_df is not None:
+        chart_df = downsampler.long_frame(iot_df, top_keywords(iot_df, 10), max_points=500)
+        st.line_chart(chart_df, x='date', y='value', color='keyword')
+    if rq_data:
+        st.caption(f"Related queries received for: {', '.join(rq_data)}")
+
+# --------------------------------------------------
+# Helper function for IOT charting
+# --------------------------------------------------
+@st.fragment
+def show_iot_chart(iot_df: pd.DataFrame):
+    """
+    Draws the IOT chart from downsampled series of a top-K selection or one page of keywords.
+    Runs as a fragment, so changing the chart options only redraws the chart, and the downsampler
+    only recomputes series it hasn't seen before.
+    """
+    keywords = [keyword for keyword in iot_df.columns if keyword != 'isPartial']
+    opt_col1, opt_col2, opt_col3 = st.columns(3)
+    with opt_col1:
+        selection = st.radio("Keywords shown", ('Top keywords', 'All, by page'), key='chart_selection',
+                             horizontal=True)
+    with opt_col2:
+        count = st.number_input("Keywords per chart", min_value=1, max_value=100, value=10, key='chart_count')
+    with opt_col3:
+        max_points = st.select_slider("Points per keyword", options=[100, 250, 500, 1000, 2000], value=500,
+                                      key='chart_points')
+
+    if selection == 'Top keywords':
+        rank_by = st.selectbox("Rank by", ('mean', 'peak', 'latest'), key='chart_rank')
+        shown = top_keywords(iot_df, int(count), by=rank_by)
+    else:
+        pages = page_count(keywords, int(count))
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key='chart_page') - 1
+        shown = page_keywords(keywords, page, int(count))
+
+    # Min/max keeps exact peaks for long, spiky series, LTTB keeps the overall shape
+    method = 'minmax' if len(iot_df) > 4 * max_points else 'lttb'
+    chart_df = downsampler.long_frame(iot_df, shown, max_points=max_points, method=method)
+    st.line_chart(chart_df, x='date', y='value', color='keyword')
+    st.caption(f"Showing {len(shown)} of {len(keywords)} keywords, at most {max_points} points each "
+               f"({len(chart_df)} of {iot_df[shown].count().sum()} points).")
 
 # ==================================================
 # Callback functions
@@ -234,6 +351,17 @@ if timeframe_option == 'Custom Date Range':
     with date_col2:
         end_date = st.date_input("End date", datetime.date.today())
 
+# ----- Cache option - refetch instead of reusing recently cached responses
+force_refresh = st.checkbox("Force refresh (ignore cached results)", key='force_refresh')
+
+# ----- Shared cache counters (the in-memory cache is shared by every session on this server)
+cache_stats = shared_cache.stats()
+st.caption(f"Shared cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+           f"{cache_stats['coalesced']} coalesced, {cache_stats['entries']} entries ({cache_stats['megabytes']} MB)")
+
+# ----- Parallel sessions - fetch several keywords at once
+workers = st.number_input("Parallel sessions", min_value=1, max_value=8, value=1, key='workers')
+
 # ----- Map user-friendly names to the API's required format
 timeframe_map = {
     'All time': 'all', 'Last 5 years': 'today 5-y',
@@ -271,19 +399,41 @@ with col_btn1:
             else:
                 selected_timeframe = timeframe_map[timeframe_option]
 
-            # Call data retrieval function
-            fetch_data(keywords, mode_choice, selected_timeframe)
-            st.success("Data collection complete!")
+            # Hand the fetch to a background job (a previous job of this session is cancelled)
+            # Force refresh only applies to this session's job, never to other sessions' fetches
+            runner = get_job_runner()
+            runner.forget(st.session_state.job_id)
+            job = FetchJob(keywords, mode_choice, selected_timeframe, int(workers), refresh=force_refresh)
+            st.session_state.job_id = runner.submit(job)
+            st.session_state.data_fetched = False
 
 # --- Reset Button ---
 with col_btn2:
     if st.button("Reset"):
+        get_job_runner().forget(st.session_state.job_id)
+        st.session_state.job_id = None
         st.session_state.data_fetched = False
         st.session_state.iot_data = None
         st.session_state.rq_data = None
         st.session_state.last_keywords = None
+        st.session_state.data_fingerprint = None
+        st.session_state.report_requested = None
         st.rerun()
 
+# --- Background job progress (polled while a job is running) ---
+if st.session_state.job_id is not None:
+    show_fetch_job()
+
+# --- Outcome of the last job, shown once ---
+if 'job_outcome' in st.session_state:
+    job_state, job_error = st.session_state.pop('job_outcome')
+    if job_state == DONE:
+        st.success("Data collection complete!")
+    elif job_state == CANCELLED:
+        st.warning("Data collection cancelled, showing the keywords fetched so far.")
+    else:
+        st.error(f"Data collection failed: {job_error}")
+
 # ==================================================
 # Section - Display & Save Results
 # ==================================================
@@ -301,7 +451,7 @@ if st.session_state.data_fetched:
         # --- Display IOT Data
         if st.session_state.iot_data is not None:
             st.subheader("Interest Over Time (IOT)")
-            st.line_chart(st.session_state.iot_data)
+            show_iot_chart(st.session_state.iot_data)
             with st.expander("View Raw IOT Data"):
                 st.dataframe(st.session_state.iot_data)
                 # --- Download IOT Data CSV ---
@@ -330,17 +480,46 @@ if st.session_state.data_fetched:
     with status_col:
         st.subheader("Download Report")
 
-        # --- XLSX Download Button ---
-        # ----- Generate data variables before button (IOT, RQ, timestamp)
-        xlsx_data = save_to_xlsx(st.session_state.iot_data, st.session_state.rq_data)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        # ----- Create Button
-        st.download_button(
-            label = "Download Full Report as XLSX",
-            data = xlsx_data,
-            file_name = f"full_report_{timestamp}.xlsx",
-            mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        # ----- Reports are only built once asked for, then served from cache on every rerun
+        fingerprint = st.session_state.data_fingerprint
+        if st.session_state.report_requested != fingerprint:
+            if st.button("Prepare Report Downloads"):
+                st.session_state.report_requested = fingerprint
+
+        if st.session_state.report_requested == fingerprint:
+            # --- XLSX Download Button ---
+            # ----- Generate data variables before button (IOT, RQ, timestamp)
+            with st.spinner("Building reports..."):
+                xlsx_data = build_xlsx_report(fingerprint, st.session_state.iot_data, st.session_state.rq_data)
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+            # ----- Create Button (downloading doesn't need a rerun)
+            st.download_button(
+                label = "Download Full Report as XLSX",
+                data = xlsx_data,
+                file_name = f"full_report_{timestamp}.xlsx",
+                mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click = "ignore"
+            )
+
+            # --- Parquet Download Buttons (long format: keyword, date, value, timeframe, geo, fetched_at) ---
+            if st.session_state.iot_data is not None:
+                st.download_button(
+                    label = "Download IOT Data as Parquet",
+                    data = build_parquet_report(fingerprint, 'iot', st.session_state.iot_data, None,
+                                                st.session_state.last_timeframe, st.session_state.fetched_at),
+                    file_name = f"iot_data_{timestamp}.parquet",
+                    mime = "application/vnd.apache.parquet",
+                    on_click = "ignore"
+                )
+            if st.session_state.rq_data:
+                st.download_button(
+                    label = "Download RQ Data as Parquet",
+                    data = build_parquet_report(fingerprint, 'rq', None, st.session_state.rq_data,
+                                                st.session_state.last_timeframe, st.session_state.fetched_at),
+                    file_name = f"rq_data_{timestamp}.parquet",
+                    mime = "application/vnd.apache.parquet",
+                    on_click = "ignore"
+                )
         # --- Visual Speparator
         #st.markdown("---")
@@ -15,10 +15,11 @@
 
 # --- import libraries ---
 import os
+import hashlib
 import datetime
 import streamlit as st
 import pandas as pd
-from trends_tool import get_iot, get_rq
+from trends_tool import get_iot, get_rq, IOTAccumulator
 from io import BytesIO
 
 # --------------------------------------------------
@@ -59,13 +60,11 @@ def save_to_xlsx(iot_df: pd.DataFrame | None, rq_data: dict | None) -> bytes:
                 # Top Related Queries
                 top_df = data.get('top')
                 if top_df is not None:
-                    top_df['Original Keyword'] = keyword
-                    all_top_dfs.append(top_df)
+                    all_top_dfs.append(top_df.assign(**{'Original Keyword': keyword}))
                 # Rising Related Queries
                 rising_df = data.get('rising')
                 if rising_df is not None:
-                    rising_df['Original Keyword'] = keyword
-                    all_rising_dfs.append(rising_df)
+                    all_rising_dfs.append(rising_df.assign(**{'Original Keyword': keyword}))
             if all_top_dfs:
                 master_top_df = pd.concat(all_top_dfs, ignore_index=True)
                 master_top_df.to_excel(writer, sheet_name='Top_Related_Queries', index=False)
@@ -77,6 +76,36 @@ def save_to_xlsx(iot_df: pd.DataFrame | None, rq_data: dict | None) -> bytes:
     processed_data = output.getvalue()
     return processed_data
 
+# --------------------------------------------------
+# Helper functions for cached report downloads
+# --------------------------------------------------
+def data_fingerprint(iot_df: pd.DataFrame | None, rq_data: dict | None, *extra) -> str:
+    """
+    Returns a content hash of the fetched results (plus any extra values, e.g. the timeframe).
+    Computed once per fetch and used as the cache key for report downloads.
+    """
+    digest = hashlib.sha256()
+    if iot_df is not None:
+        digest.update(repr(list(iot_df.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(iot_df, index=True).values.tobytes())
+    for keyword, data in (rq_data or {}).items():
+        digest.update(keyword.encode('utf-8'))
+        for part in ('top', 'rising'):
+            part_df = data.get(part)
+            if part_df is not None:
+                digest.update(part.encode('utf-8'))
+                digest.update(pd.util.hash_pandas_object(part_df, index=False).values.tobytes())
+    for value in extra:
+        digest.update(repr(value).encode('utf-8'))
+    return digest.hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_xlsx_report(fingerprint: str, _iot_df: pd.DataFrame | None, _rq_data: dict | None) -> bytes:
+    """
+    Builds the XLSX report once per data fingerprint (Streamlit skips hashing the underscore arguments).
+    """
+    return save_to_xlsx(_iot_df, _rq_data)
+
 # ==================================================
 # Initialize Session State
 # ==================================================
@@ -89,6 +118,10 @@ if 'rq_data' not in st.session_state:
     st.session_state.rq_data = None
 if 'last_keywords' not in st.session_state:
     st.session_state.last_keywords = None
+if 'data_fingerprint' not in st.session_state:
+    st.session_state.data_fingerprint = None
+if 'report_requested' not in st.session_state:
+    st.session_state.report_requested = None
 if 'keywords_input' not in st.session_state:
     st.session_state.keywords_input = "flare jeans, graphic tees, leather boots"
 
@@ -221,7 +254,7 @@ with col_btn1:
             # Initialize data variables
             iot_data = None
             rq_data = None
-            all_iot_data = pd.DataFrame()
+            all_iot_data = IOTAccumulator()
 
             # --- Fetch Data based on Modality ---
             with st.spinner("Fetching data..."):
@@ -233,13 +266,9 @@ with col_btn1:
                         st.write(f"Fetching IOT data for {len(keywords)} keywords in {len(keyword_chunks)} batches....")
                     for chunk in keyword_chunks:
                         iot_chunk_data = get_iot(chunk, timeframe=selected_timeframe)
-                        if iot_chunk_data is not None:
-                            if all_iot_data.empty:
-                                all_iot_data = iot_chunk_data
-                            else:
-                                all_iot_data = all_iot_data.join(iot_chunk_data, how="outer")
-                    if not all_iot_data.empty: 
-                        st.session_state.iot_data = all_iot_data    # Store final DataFrame
+                        all_iot_data.add_frame(iot_chunk_data)
+                    if len(all_iot_data): 
+                        st.session_state.iot_data = all_iot_data.to_frame()    # Store final DataFrame
                     else:
                         st.session_state.iot_data = None
                 if mode_choice in ['Both', 'Related Queries Only']:
@@ -250,6 +279,8 @@ with col_btn1:
 
             st.session_state.data_fetched = True    # Flag that data has been successfully collected
             st.session_state.last_keywords = keywords   # Remember search keywords
+            # Report downloads are cached against this fingerprint
+            st.session_state.data_fingerprint = data_fingerprint(st.session_state.iot_data, st.session_state.rq_data)
             st.success("Data collection complete!")
 
 
@@ -260,6 +291,8 @@ with col_btn2:
         st.session_state.iot_data = None
         st.session_state.rq_data = None
         st.session_state.last_keywords = None
+        st.session_state.data_fingerprint = None
+        st.session_state.report_requested = None
         st.rerun()
 
 # ==================================================
@@ -271,17 +304,25 @@ if st.session_state.data_fetched:
     st.markdown(f"#**Showing Results for:** '{', '.join(st.session_state.last_keywords)}'")
     
     # --- XLSX Download Button ---
-    # ----- Generate data variables before button (IOT, RQ, timestamp)
-    xlsx_data = save_to_xlsx(st.session_state.iot_data, st.session_state.rq_data)
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    # ----- Create Button
-    st.download_button(
-        label = "Download Full Report as XLSX",
-        data = xlsx_data,
-        file_name = f"full_report_{timestamp}.xlsx",
-        mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # ----- The report is only built once asked for, then served from cache on every rerun
+    fingerprint = st.session_state.data_fingerprint
+    if st.session_state.report_requested != fingerprint:
+        if st.button("Prepare XLSX Report"):
+            st.session_state.report_requested = fingerprint
+    if st.session_state.report_requested == fingerprint:
+        # ----- Generate data variables before button (IOT, RQ, timestamp)
+        with st.spinner("Building report..."):
+            xlsx_data = build_xlsx_report(fingerprint, st.session_state.iot_data, st.session_state.rq_data)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # ----- Create Button (downloading doesn't need a rerun)
+        st.download_button(
+            label = "Download Full Report as XLSX",
+            data = xlsx_data,
+            file_name = f"full_report_{timestamp}.xlsx",
+            mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click = "ignore"
+        )
     # --- Visual Speparator
     st.markdown("---")
 
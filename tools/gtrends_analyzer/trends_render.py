@@ -0,0 +1,229 @@
+# tools/gtrends_analyzer/trends_render.py
+# This module renders IOT charts headlessly (combined, small-multiple grids, one file per keyword)
+
+# import libraries
+import os
+import re
+import hashlib
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from trends_charts import downsample_series, top_keywords
+
+# Renderer settings
+DPI = 100
+KEYWORD_FIGSIZE = (8, 4)        # Inches, per-keyword charts
+PANEL_SIZE = (3.2, 2.2)         # Inches, one small-multiple panel
+GRID_COLUMNS = 4
+GRID_ROWS = 5                   # Panels per grid page = GRID_COLUMNS * GRID_ROWS
+KEYWORDS_PER_TASK = 25          # Keywords rendered per process pool task (amortizes process overhead)
+
+@contextmanager
+def _figure(figsize: tuple[float, float]):
+    """
+    Yields an Agg-backed Figure that never touches pyplot's global figure registry, and clears it on exit,
+    so batch renders don't keep figures (and their memory) alive.
+    """
+    fig = Figure(figsize=figsize, dpi=DPI)
+    FigureCanvasAgg(fig)
+    try:
+        yield fig
+    finally:
+        fig.clear()
+
+def _safe_name(keyword: str) -> str:
+    return re.sub(r'[^\w\-]+', '_', keyword).strip('_') or 'keyword'
+
+def _unique_names(keywords: list[str]) -> list[str]:
+    """
+    Returns one file name stem per keyword. Keywords whose safe names collide (e.g. "jeans!" and "jeans?",
+    or names differing only in case, which case-insensitive file systems treat as the same file) and
+    keywords that would clash with the grid pages get a short hash of the keyword appended, so no chart
+    overwrites another.
+    """
+    stems = []
+    taken = set()
+    for keyword in keywords:
+        stem = _safe_name(keyword)
+        # iot_grid_<page> names belong to the small-multiple pages
+        if stem.lower() in taken or re.fullmatch(r'grid_\d+', stem.lower()):
+            stem = f"{stem}_{hashlib.sha1(keyword.encode('utf-8')).hexdigest()[:8]}"
+        taken.add(stem.lower())
+        stems.append(stem)
+    return stems
+
+def _style_axes(ax, title: str, small: bool = False):
+    ax.set_title(title, fontsize=9 if small else 12)
+    ax.grid(True, alpha=0.4)
+    if small:
+        ax.tick_params(labelsize=7)
+        for label in ax.get_xticklabels():
+            label.set_rotation(30)
+            label.set_horizontalalignment('right')
+
+def render_line_chart(iot_df: pd.DataFrame, keywords: list[str], filename: str,
+                      title: str = "Google Trends: Interest Over Time", max_points: int | None = None) -> float:
+    """
+    Renders every given keyword as one line on a single chart (the classic plot_iot chart).
+
+    Returns:
+        float: Render time in seconds.
+    """
+    started = time.perf_counter()
+    with _figure((12, 6)) as fig:
+        ax = fig.add_subplot()
+        # More points than horizontal pixels can't be seen
+        max_points = max_points or int(fig.get_figwidth() * DPI)
+        for keyword in keywords:
+            series = downsample_series(iot_df[keyword], max_points, method='minmax')
+            ax.plot(series.index, series.to_numpy(), label=keyword)
+        _style_axes(ax, title)
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Relative Interest")
+        ax.legend()
+        fig.tight_layout()  # Adjusts the plot layout to prevent label overlapping
+        fig.savefig(filename)
+    return time.perf_counter() - started
+
+def _render_keyword_batch(items: list[tuple[str, str, pd.Series]], output_dir: str,
+                          formats: tuple[str, ...]) -> list[dict]:
+    """
+    Renders one chart per (keyword, file name stem, series) item (runs inside a pool worker).
+    Returns one timing record per keyword.
+    """
+    results = []
+    for keyword, stem, series in items:
+        started = time.perf_counter()
+        paths = []
+        with _figure(KEYWORD_FIGSIZE) as fig:
+            ax = fig.add_subplot()
+            ax.plot(series.index, series.to_numpy())
+            _style_axes(ax, keyword)
+            ax.set_ylabel("Relative Interest")
+            # Fixed margins (tight_layout measures every label, which dominates batch render time)
+            fig.subplots_adjust(left=0.09, right=0.98, bottom=0.1, top=0.9)
+            for fmt in formats:
+                path = os.path.join(output_dir, f"iot_{stem}.{fmt}")
+                fig.savefig(path, format=fmt)
+                paths.append(path)
+        results.append({'name': keyword, 'paths': paths, 'seconds': time.perf_counter() - started})
+    return results
+
+def _render_grid_page(page: int, items: list[tuple[str, pd.Series]], output_dir: str, formats: tuple[str, ...],
+                      columns: int) -> list[dict]:
+    """
+    Renders one page of small multiples (runs inside a pool worker). All panels share the y axis scale.
+    """
+    started = time.perf_counter()
+    rows = -(-len(items) // columns)
+    paths = []
+    with _figure((PANEL_SIZE[0] * columns, PANEL_SIZE[1] * rows)) as fig:
+        axes = fig.subplots(rows, columns, sharey=True, squeeze=False)
+        for ax, (keyword, series) in zip(axes.flat, items):
+            ax.plot(series.index, series.to_numpy(), linewidth=1)
+            _style_axes(ax, keyword, small=True)
+        # Hide the panels left over on the last row
+        for ax in axes.flat[len(items):]:
+            ax.set_visible(False)
+        fig.subplots_adjust(left=0.05, right=0.99, bottom=0.08, top=0.95, wspace=0.15, hspace=0.6)
+        for fmt in formats:
+            path = os.path.join(output_dir, f"iot_grid_{page + 1:03d}.{fmt}")
+            fig.savefig(path, format=fmt)
+            paths.append(path)
+    return [{'name': f"grid page {page + 1}", 'paths': paths, 'seconds': time.perf_counter() - started}]
+
+class ChartRenderer:
+    """
+    Renders per-keyword charts and small-multiple grids on a process pool (matplotlib isn't thread-safe,
+    and rendering is CPU bound). Series are downsampled to the chart's pixel width before they are
+    sent to the workers, which also keeps the pickled payloads small.
+    """
+    def __init__(self, output_dir: str, formats: tuple[str, ...] = ('png',), workers: int | None = None):
+        """
+        Args:
+            output_dir (str): Directory the chart files are written to.
+            formats (tuple[str, ...]): File formats to save each chart in ('png', 'svg', ...).
+            workers (int | None): Number of render processes (default: CPU count). 1 renders in this process.
+        """
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.workers = workers or os.cpu_count() or 1
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _run(self, tasks: list[tuple]) -> dict:
+        """
+        Runs (function, *args) tasks, in a process pool when there is more than one, and collects the timings.
+        """
+        started = time.perf_counter()
+        records = []
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as executor:
+                futures = [executor.submit(*task) for task in tasks]
+                for future in futures:
+                    records.extend(future.result())
+        else:
+            for function, *args in tasks:
+                records.extend(function(*args))
+
+        seconds = time.perf_counter() - started
+        slowest = max(records, key=lambda record: record['seconds'], default=None)
+        return {
+            'charts': len(records),
+            'files': [path for record in records for path in record['paths']],
+            'seconds': round(seconds, 2),                                       # Wall time
+            'render_seconds': round(sum(record['seconds'] for record in records), 2),   # Summed over workers
+            'charts_per_second': round(len(records) / seconds, 1) if seconds else None,
+            'slowest': (slowest['name'], round(slowest['seconds'], 3)) if slowest else None,
+        }
+
+    def render_keywords(self, iot_df: pd.DataFrame, keywords: list[str] | None = None) -> dict:
+        """
+        Saves one chart per keyword (iot_<keyword>.<fmt>) and returns the render timings.
+        """
+        keywords = [k for k in (keywords or iot_df.columns) if k in iot_df.columns and k != 'isPartial']
+        max_points = int(KEYWORD_FIGSIZE[0] * DPI)
+        # File names are made unique across all keywords before they are split into tasks
+        items = [(keyword, stem, downsample_series(iot_df[keyword], max_points, method='minmax'))
+                 for keyword, stem in zip(keywords, _unique_names(keywords))]
+        tasks = [(_render_keyword_batch, items[i:i + KEYWORDS_PER_TASK], self.output_dir, self.formats)
+                 for i in range(0, len(items), KEYWORDS_PER_TASK)]
+        return self._run(tasks)
+
+    def render_grid(self, iot_df: pd.DataFrame, keywords: list[str] | None = None, columns: int = GRID_COLUMNS,
+                    rows: int = GRID_ROWS) -> dict:
+        """
+        Saves the keywords as small-multiple grids (iot_grid_<page>.<fmt>, columns x rows panels per page)
+        and returns the render timings.
+        """
+        keywords = [k for k in (keywords or iot_df.columns) if k in iot_df.columns and k != 'isPartial']
+        max_points = int(PANEL_SIZE[0] * DPI)
+        items = [(keyword, downsample_series(iot_df[keyword], max_points, method='minmax')) for keyword in keywords]
+        per_page = columns * rows
+        tasks = [(_render_grid_page, page, items[i:i + per_page], self.output_dir, self.formats, columns)
+                 for page, i in enumerate(range(0, len(items), per_page))]
+        return self._run(tasks)
+
+def print_render_summary(label: str, summary: dict):
+    """
+    Prints a one-line render timing summary.
+    """
+    print(f"Rendered {summary['charts']} {label} ({len(summary['files'])} files) in {summary['seconds']} s "
+          f"({summary['charts_per_second']} charts/s, {summary['render_seconds']} s of rendering; "
+          f"slowest: {summary['slowest']})\n")
+
+# TEST BLOCK
+if __name__ == "__main__":
+    import numpy as np
+
+    # Synthetic weekly data for a few hundred keywords
+    dates = pd.date_range('2004-01-04', periods=1100, freq='W')
+    rng = np.random.default_rng(0)
+    test_df = pd.DataFrame({f"keyword {i}": rng.integers(0, 100, len(dates)) for i in range(200)}, index=dates)
+
+    renderer = ChartRenderer(os.path.join("..", "..", "downloads", "gtrends_charts_test"), formats=('png', 'svg'))
+    print_render_summary("keyword charts", renderer.render_keywords(test_df))
+    print_render_summary("grid pages", renderer.render_grid(test_df))
+    print(f"Combined chart: {render_line_chart(test_df, top_keywords(test_df, 10), os.path.join(renderer.output_dir, 'iot_chart.png')):.2f} s\n")
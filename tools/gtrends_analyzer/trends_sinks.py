@@ -0,0 +1,256 @@
+# tools/gtrends_analyzer/trends_sinks.py
+# This module provides the long-format (tidy) schema for trends results, Parquet exports,
+# and streaming output sinks that write each keyword's results as soon as they arrive
+
+# import libraries
+import io
+import os
+import datetime
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import trends_tool
+
+# --- Long (tidy) schemas, shared by the streaming sinks and the Parquet exports ---
+# Repeated strings are dictionary encoded, so each distinct keyword/timeframe/geo is stored once per row group
+_dict_string = pa.dictionary(pa.int32(), pa.string())
+
+IOT_SCHEMA = pa.schema([
+    ('keyword', _dict_string),
+    ('date', pa.timestamp('ns')),
+    ('value', pa.float64()),        # Batched (rescaled) values are fractional
+    ('timeframe', _dict_string),
+    ('geo', _dict_string),
+    ('fetched_at', pa.timestamp('ms')),
+])
+
+RQ_SCHEMA = pa.schema([
+    ('keyword', _dict_string),
+    ('part', _dict_string),         # 'top' or 'rising'
+    ('rank', pa.int32()),           # Position in Google's list, starting at 1
+    ('query', pa.string()),
+    ('value', pa.int64()),
+    ('timeframe', _dict_string),
+    ('geo', _dict_string),
+    ('fetched_at', pa.timestamp('ms')),
+])
+
+def iot_long_frame(keyword: str, series: pd.Series, timeframe: str, geo: str | None = None,
+                   fetched_at: datetime.datetime | None = None) -> pd.DataFrame:
+    """
+    Converts one keyword's IOT series into long-format rows (see IOT_SCHEMA).
+    geo defaults to trends_tool.iot_geo as it is when called (so changing the region is picked up).
+    """
+    geo = trends_tool.iot_geo if geo is None else geo
+    return pd.DataFrame({
+        'keyword': keyword,
+        'date': series.index,
+        'value': series.astype(float).values,
+        'timeframe': timeframe,
+        'geo': geo,
+        'fetched_at': (fetched_at or datetime.datetime.now()).replace(microsecond=0),
+    })
+
+def rq_long_frame(keyword: str, rq: dict, timeframe: str, geo: str | None = None,
+                  fetched_at: datetime.datetime | None = None) -> pd.DataFrame | None:
+    """
+    Converts one keyword's related queries ({'top': DataFrame | None, 'rising': DataFrame | None})
+    into long-format rows (see RQ_SCHEMA), or None if neither part has data.
+    geo defaults to trends_tool.rq_geo as it is when called.
+    """
+    geo = trends_tool.rq_geo if geo is None else geo
+    frames = []
+    for part in ('top', 'rising'):
+        part_df = rq.get(part)
+        if part_df is not None and not part_df.empty:
+            frames.append(pd.DataFrame({
+                'keyword': keyword,
+                'part': part,
+                'rank': range(1, len(part_df) + 1),
+                'query': part_df['query'].values,
+                'value': part_df['value'].values,
+            }))
+    if not frames:
+        return None
+    df = pd.concat(frames, ignore_index=True)
+    df['timeframe'] = timeframe
+    df['geo'] = geo
+    df['fetched_at'] = (fetched_at or datetime.datetime.now()).replace(microsecond=0)
+    return df
+
+def iot_to_table(iot_df: pd.DataFrame, timeframe: str, geo: str | None = None,
+                 fetched_at: datetime.datetime | None = None) -> pa.Table:
+    """
+    Converts a wide IOT DataFrame (one column per keyword) into a long-format Arrow table.
+    """
+    fetched_at = fetched_at or datetime.datetime.now()
+    frames = [iot_long_frame(keyword, iot_df[keyword], timeframe, geo, fetched_at)
+              for keyword in iot_df.columns if keyword != 'isPartial']
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=IOT_SCHEMA.names)
+    return pa.Table.from_pandas(df, schema=IOT_SCHEMA, preserve_index=False)
+
+def rq_to_table(rq_data: dict, timeframe: str, geo: str | None = None,
+                fetched_at: datetime.datetime | None = None) -> pa.Table:
+    """
+    Converts the get_rq() result (keyword -> {'top': ..., 'rising': ...}) into one long-format Arrow table.
+    """
+    fetched_at = fetched_at or datetime.datetime.now()
+    frames = [rq_long_frame(keyword, rq, timeframe, geo, fetched_at) for keyword, rq in rq_data.items()]
+    frames = [df for df in frames if df is not None]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RQ_SCHEMA.names)
+    return pa.Table.from_pandas(df, schema=RQ_SCHEMA, preserve_index=False)
+
+def write_parquet(table: pa.Table, path: str):
+    """
+    Writes a long-format table to a Parquet file (zstd compressed).
+    """
+    pq.write_table(table, path, compression='zstd')
+
+def parquet_bytes(table: pa.Table) -> bytes:
+    """
+    Returns a long-format table as the bytes of a Parquet file (e.g. for a download button).
+    """
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression='zstd')
+    return buffer.getvalue()
+
+class ResultSink:
+    """
+    Appends each keyword's results to output files as soon as they arrive, instead of
+    collecting everything in memory and writing it at the end of the run.
+
+    Results are written in the long format of IOT_SCHEMA / RQ_SCHEMA, so rows can be appended
+    one keyword at a time:
+        iot_stream_<timestamp>  - keyword, date, value, timeframe, geo, fetched_at
+        rq_stream_<timestamp>   - keyword, part, rank, query, value, timeframe, geo, fetched_at
+
+    write_iot() and write_rq() have the same signature as the on_result callbacks of get_iot()/get_rq(),
+    so a sink's methods can be passed to them directly. Subclasses implement _write() for one file format.
+    """
+    extension = ''
+
+    def __init__(self, output_dir: str, timestamp: str, timeframe: str):
+        """
+        Args:
+            output_dir (str): Directory the stream files are created in.
+            timestamp (str): Suffix for the file names, so each run writes its own files.
+            timeframe (str): The run's timeframe, recorded on every row.
+        """
+        self.paths = {name: os.path.join(output_dir, f"{name}_stream_{timestamp}.{self.extension}")
+                      for name in ('iot', 'rq')}
+        self.timeframe = timeframe
+        self.rows_written = 0
+        self._lock = threading.Lock()   # Results can arrive from several scheduler threads
+
+    def write_iot(self, keyword: str, series: pd.Series):
+        """
+        Appends one keyword's IOT series.
+        """
+        self._append('iot', iot_long_frame(keyword, series, self.timeframe))
+
+    def write_rq(self, keyword: str, rq: dict):
+        """
+        Appends one keyword's related queries ({'top': DataFrame | None, 'rising': DataFrame | None}).
+        """
+        df = rq_long_frame(keyword, rq, self.timeframe)
+        if df is not None:
+            self._append('rq', df)
+
+    def _append(self, name: str, df: pd.DataFrame):
+        with self._lock:
+            self._write(name, df)
+            self.rows_written += len(df)
+
+    def _write(self, name: str, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Flushes and closes any open files.
+        """
+
+    def written_paths(self) -> list[str]:
+        """
+        Returns the stream files that received at least one row.
+        """
+        return [path for path in self.paths.values() if os.path.exists(path)]
+
+class CSVSink(ResultSink):
+    """
+    Appends rows to CSV files (header written with the first rows), flushed after every keyword.
+    """
+    extension = 'csv'
+
+    def _write(self, name: str, df: pd.DataFrame):
+        path = self.paths[name]
+        header = not os.path.exists(path)
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            df.to_csv(f, header=header, index=False)
+
+class JSONLSink(ResultSink):
+    """
+    Appends one JSON object per row, flushed after every keyword.
+    """
+    extension = 'jsonl'
+
+    def _write(self, name: str, df: pd.DataFrame):
+        with open(self.paths[name], 'a', encoding='utf-8') as f:
+            f.write(df.to_json(orient='records', lines=True, date_format='iso'))
+
+class ParquetSink(ResultSink):
+    """
+    Appends rows to Parquet files with the IOT_SCHEMA / RQ_SCHEMA layout.
+    Rows are buffered into row groups of up to `row_group_rows` (one row group per keyword would bloat
+    the file with per-group metadata), so memory stays bounded. The files are only readable once close()
+    has written their footers, so use the CSV or JSONL sink to tail a run while it is in progress.
+    """
+    extension = 'parquet'
+    schemas = {'iot': IOT_SCHEMA, 'rq': RQ_SCHEMA}
+    row_group_rows = 50_000
+
+    def __init__(self, output_dir: str, timestamp: str, timeframe: str):
+        super().__init__(output_dir, timestamp, timeframe)
+        self._writers = {}
+        self._pending = {name: [] for name in self.schemas}
+
+    def _write(self, name: str, df: pd.DataFrame):
+        self._pending[name].append(df)
+        if sum(len(pending_df) for pending_df in self._pending[name]) >= self.row_group_rows:
+            self._flush(name)
+
+    def _flush(self, name: str):
+        if not self._pending[name]:
+            return
+        schema = self.schemas[name]
+        writer = self._writers.get(name)
+        if writer is None:
+            writer = self._writers[name] = pq.ParquetWriter(self.paths[name], schema, compression='zstd')
+        df = pd.concat(self._pending[name], ignore_index=True)
+        writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+        self._pending[name].clear()
+
+    def close(self):
+        with self._lock:
+            for name in self.schemas:
+                self._flush(name)
+            for writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+
+# Sink classes by output format name
+SINKS = {
+    'csv': CSVSink,
+    'jsonl': JSONLSink,
+    'parquet': ParquetSink,
+}
+
+def open_sink(output_format: str, output_dir: str, timestamp: str, timeframe: str) -> ResultSink:
+    """
+    Creates a streaming sink for the given format ('csv', 'jsonl' or 'parquet').
+    """
+    try:
+        sink_class = SINKS[output_format]
+    except KeyError:
+        raise ValueError(f"Unknown stream format '{output_format}'. Choose from: {', '.join(SINKS)}")
+    return sink_class(output_dir, timestamp, timeframe)
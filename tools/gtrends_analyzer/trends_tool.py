@@ -1,11 +1,19 @@
 # tools/gtrends_analyzer/trends_tool.py
 
 # import libraries
-import time
-import random
 import os
+import json
+import datetime
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import requests
 import pandas as pd
-from pytrends.request import TrendReq
+from pytrends import exceptions
+from pytrends.request import TrendReq, BASE_TRENDS_URL
+from trends_cache import TrendsCache, SharedFetchCache
+from trends_limiter import RateLimiter, is_rate_limited
 
 # --- Add a standard browser User-Agent ---
 HEADERS = {
@@ -21,9 +29,61 @@ PROXY_LIST = []
 #RES_PROXY = os.getenv("BD_PROXY_URL")
 
 # Set function variables
-delay_low = 20
-delay_high = 45
 max_retries = 3
+max_payload_size = 5    # Google Trends accepts at most 5 terms per payload
+iot_geo = 'US'          # Region for Interest Over Time requests
+rq_geo = ''             # Region for Related Queries requests ('' is worldwide)
+
+# Shared on-disk response cache (set .enabled = False for --no-cache, .refresh = True for --refresh;
+# .refresh is only the default, get_iot/get_rq(refresh=...) override it per call)
+response_cache = TrendsCache()
+
+# In-memory cache shared by every thread of the process (e.g. all GUI sessions), with request coalescing
+shared_cache = SharedFetchCache()
+
+# Shared adaptive rate limiter (replaces the fixed 20-45 s random sleep before every call)
+rate_limiter = RateLimiter()
+
+class _SessionTrendReq(TrendReq):
+    """
+    TrendReq that keeps one requests.Session alive for all of its calls.
+    Stock pytrends opens a new session for every request, so each call pays for a fresh TCP/TLS setup.
+    """
+    def __init__(self, *args, **kwargs):
+        self.session = requests.Session()
+        super().__init__(*args, **kwargs)
+        self.session.headers.update(self.headers)
+
+    def GetGoogleCookie(self):
+        """
+        Gets the NID cookie through the kept-alive session (proxies aren't used by this tool).
+        """
+        response = self.session.get(f'{BASE_TRENDS_URL}/explore/?geo={self.hl[-2:]}',
+                                    timeout=self.timeout, **self.requests_args)
+        return dict(filter(lambda i: i[0] == 'NID', response.cookies.items()))
+
+    def _get_data(self, url, method=TrendReq.GET_METHOD, trim_chars=0, **kwargs):
+        """
+        Same contract as TrendReq._get_data, but sends the request through self.session.
+        """
+        if method == TrendReq.POST_METHOD:
+            response = self.session.post(url, timeout=self.timeout, cookies=self.cookies,
+                                         **kwargs, **self.requests_args)
+        else:
+            response = self.session.get(url, timeout=self.timeout, cookies=self.cookies,
+                                        **kwargs, **self.requests_args)
+
+        # Google answers with JSON or JavaScript content types, prefixed by a few garbage characters
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code == 200 and any(t in content_type for t in
+                                               ('application/json', 'application/javascript', 'text/javascript')):
+            return json.loads(response.text[trim_chars:])
+        if response.status_code == 429:
+            raise exceptions.TooManyRequestsError.from_response(response)
+        raise exceptions.ResponseError.from_response(response)
+
+    def close(self):
+        self.session.close()
 
 def _get_pytrends_client() -> TrendReq:
     """
@@ -52,19 +112,395 @@ def _get_pytrends_client() -> TrendReq:
 
     # Initialize pytrends WITHOUT PROXY
     requests_args = {'headers': HEADERS} #, 'verify': False
-    return TrendReq(hl='en-US', tz=300, timeout=(10,25), requests_args=requests_args)
-    
+    return _SessionTrendReq(hl='en-US', tz=300, timeout=(10,25), requests_args=requests_args)
+
+class TrendsClientPool:
+    """
+    Keeps TrendReq clients (HTTP session + Google cookie) alive across keywords and calls.
+    A client is only rotated out (closed and replaced on next use) when a request through it fails.
+    """
+    def __init__(self, max_idle: int = 4, factory=_get_pytrends_client):
+        """
+        Args:
+            max_idle (int): Maximum number of idle clients kept for reuse.
+            factory (callable): Creates a new client.
+        """
+        self.max_idle = max_idle
+        self.factory = factory
+        self.created = 0
+        self.rotated = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def client(self):
+        """
+        Lends out a client for the duration of a with-block.
+        The client is returned to the pool on success and discarded if the block raises.
+        """
+        with self._lock:
+            pytrends = self._idle.pop() if self._idle else None
+        if pytrends is None:
+            pytrends = self.factory()
+            with self._lock:
+                self.created += 1
+
+        try:
+            yield pytrends
+        except Exception:
+            # Errors (429s, bad cookies, dropped connections) rotate the session out
+            self._close(pytrends)
+            with self._lock:
+                self.rotated += 1
+            raise
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(pytrends)
+                return
+        self._close(pytrends)
+
+    def _close(self, pytrends):
+        close = getattr(pytrends, 'close', None)
+        if close is not None:
+            close()
+
+    def clear(self):
+        """
+        Closes all idle clients.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pytrends in idle:
+            self._close(pytrends)
+
+# Shared client pool, so sessions and cookies are reused across keywords
+client_pool = TrendsClientPool()
+
+class FetchScheduler:
+    """
+    Runs payload fetches on N independent sessions at once.
+
+    Each worker has its own client (session + cookie) and its own adaptive RateLimiter, and all
+    worker limiters share a global parent limiter that caps total requests per minute. A 429 on
+    any worker slows both that worker and the global cap.
+    """
+    def __init__(self, workers: int = 3, requests_per_minute: float = 30.0, parent: RateLimiter | None = None):
+        """
+        Args:
+            workers (int): Number of concurrent sessions.
+            requests_per_minute (float): Global cap across all sessions.
+            parent (RateLimiter | None): Limiter shared with other schedulers (e.g. a process-wide cap),
+                which every request of this scheduler must also pass.
+        """
+        self.workers = max(1, workers)
+        cap_interval = 60 / requests_per_minute
+        self.global_limiter = RateLimiter(initial_interval=cap_interval, min_interval=cap_interval, jitter=0,
+                                          parent=parent)
+        self.limiters = [RateLimiter(parent=self.global_limiter) for _ in range(self.workers)]
+        self.pools = [TrendsClientPool(max_idle=1, factory=client_pool.factory) for _ in range(self.workers)]
+
+    def map(self, fetch, items: list, on_done=None) -> list:
+        """
+        Calls fetch(item, limiter, pool) for every item, at most one in-flight call per session.
+
+        Args:
+            fetch (callable): Fetch function taking (item, limiter, pool).
+            items (list): The work items (e.g. keyword payloads).
+            on_done (callable | None): Called as on_done(index, result) from the worker thread as each item finishes.
+
+        Returns:
+            list: The results, in the same order as items.
+        """
+        results = [None] * len(items)
+        work = queue.Queue()
+        for index, item in enumerate(items):
+            work.put((index, item))
+
+        def worker(limiter, pool):
+            while True:
+                try:
+                    index, item = work.get_nowait()
+                except queue.Empty:
+                    return
+                results[index] = fetch(item, limiter, pool)
+                if on_done is not None:
+                    on_done(index, results[index])
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(worker, limiter, pool) for limiter, pool in zip(self.limiters, self.pools)]
+            for future in futures:
+                future.result()
+        return results
+
+    def metrics(self) -> dict:
+        """
+        Returns the global and per-session rate limiter metrics.
+        """
+        return {'global': self.global_limiter.metrics(),
+                'sessions': [limiter.metrics() for limiter in self.limiters]}
+
  
-def get_iot(keywords: list[str], timeframe: str = 'today 12-m') -> pd.DataFrame | None:
+class IOTAccumulator:
+    """
+    Collects per-keyword IOT Series and aligns them to one shared DatetimeIndex once, at the end.
+    Growing a DataFrame with repeated outer joins copies the whole frame on every keyword,
+    which gets quadratic as keyword lists grow into the thousands.
+    """
+    def __init__(self):
+        self._series = {}
+
+    def add(self, keyword: str, series: pd.Series):
+        """
+        Adds (or replaces) one keyword's series.
+        """
+        self._series[keyword] = series
+
+    def add_frame(self, iot_df: pd.DataFrame | None):
+        """
+        Adds every keyword column of an IOT DataFrame (e.g. one chunk's get_iot result), skipping 'isPartial'.
+        """
+        if iot_df is None:
+            return
+        for keyword in iot_df.columns:
+            if keyword != 'isPartial':
+                self.add(keyword, iot_df[keyword])
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def to_frame(self) -> pd.DataFrame | None:
+        """
+        Builds the wide IOT DataFrame (one column per keyword, in insertion order), or None if empty.
+        """
+        if not self._series:
+            return None
+        # A single concat computes the union index once instead of once per keyword
+        return pd.concat(self._series, axis=1).sort_index()
+
+def _resolve_refresh(refresh: bool | None) -> bool:
+    # Per-call refresh flag; the module-wide response_cache.refresh is only the default (CLI --refresh)
+    return response_cache.refresh if refresh is None else refresh
+
+def _fetch_iot_payload(kw_list: list[str], timeframe: str, limiter: RateLimiter | None = None,
+                       pool: TrendsClientPool | None = None, refresh: bool | None = None) -> pd.DataFrame | None:
+    """ Fetches the raw IOT DataFrame for a single payload (up to 5 keywords) through the shared in-memory cache.
+    Concurrent identical payloads (from any thread) wait on one fetch. See _request_iot_payload for the arguments.
+    """
+    refresh = _resolve_refresh(refresh)
+    key = response_cache.make_key('iot', kw_list, timeframe, geo=iot_geo)
+    return shared_cache.get_or_fetch(key, timeframe,
+                                     lambda: _request_iot_payload(kw_list, timeframe, limiter, pool, refresh),
+                                     refresh=refresh or not response_cache.enabled)
+
+def _request_iot_payload(kw_list: list[str], timeframe: str, limiter: RateLimiter | None = None,
+                         pool: TrendsClientPool | None = None, refresh: bool | None = None) -> pd.DataFrame | None:
+    """ Fetches the raw IOT DataFrame for a single payload (up to 5 keywords), with retries.
+
+    Args:
+        kw_list (list[str]): The keywords to send together in one payload.
+        timeframe (str): The time range for the data.
+        limiter (RateLimiter | None): Rate limiter to pace requests, defaults to the shared rate_limiter.
+        pool (TrendsClientPool | None): Client pool to borrow from, defaults to the shared client_pool.
+        refresh (bool | None): Skip cached responses (default: response_cache.refresh).
+
+    Returns:
+        pd.DataFrame: The response from interest_over_time() (may be empty), or None if all retries failed.
+    """
+    limiter = limiter or rate_limiter
+    pool = pool or client_pool
+    label = ", ".join(kw_list)
+    print(f"Fetching IOT data for: '{label}'...")
+
+    # Serve from the local cache when possible (no network call, no delay)
+    cached_df = response_cache.get_iot(kw_list, timeframe, geo=iot_geo, cat=0, gprop='',
+                                       refresh=_resolve_refresh(refresh))
+    if cached_df is not None:
+        print(f"Loaded cached data for '{label}'.\n")
+        return cached_df
+
+    for attempt in range(max_retries):
+        try:
+            # Wait for the rate limiter before each call
+            limiter.acquire()
+
+            # Borrow a kept-alive client from the pool
+            with pool.client() as pytrends:
+                # Build the payload for the request & fetch the interest over time data
+                pytrends.build_payload(kw_list=kw_list, cat=0, timeframe=timeframe, geo=iot_geo, gprop='')
+                interest_df = pytrends.interest_over_time()
+
+        except Exception as e:
+            # Slow down on 429s
+            if is_rate_limited(e):
+                limiter.record_throttle()
+            print(f"Attempt {attempt + 1}/{max_retries} failed for '{label}': {e}")
+            if attempt + 1 < max_retries:
+                print("Retrying...\n")
+            else:
+                print(f"All retries failed for '{label}'.\n")
+        else:
+            # Success: cache the response and return without retrying
+            limiter.record_success()
+            print(f"Successfully fetched data for '{label}'.\n")
+            response_cache.put_iot(kw_list, timeframe, interest_df, geo=iot_geo, cat=0, gprop='')
+            return interest_df
+
+    return None
+
+def _fetch_iot_payloads(payloads: list[list[str]], timeframe: str, scheduler: FetchScheduler | None = None,
+                        on_done=None, refresh: bool | None = None) -> list[pd.DataFrame | None]:
+    """
+    Fetches several IOT payloads, one after another or concurrently through a scheduler.
+    Results are returned in payload order; on_done(index, result) is called as each payload finishes.
+    """
+    if scheduler is not None:
+        return scheduler.map(lambda kw_list, limiter, pool: _fetch_iot_payload(kw_list, timeframe, limiter, pool, refresh),
+                             payloads, on_done)
+
+    responses = []
+    for index, kw_list in enumerate(payloads):
+        responses.append(_fetch_iot_payload(kw_list, timeframe, refresh=refresh))
+        if on_done is not None:
+            on_done(index, responses[-1])
+    return responses
+
+def _get_iot_batched(keywords: list[str], timeframe: str, anchor: str | None = None,
+                     scheduler: FetchScheduler | None = None, reference: pd.Series | None = None,
+                     refresh: bool | None = None) -> tuple[dict[str, pd.Series], list[str], pd.Series | None]:
+    """ Fetches IOT data with up to 5 keywords per payload, rescaled to a shared anchor keyword.
+
+    Every payload contains the anchor plus up to 4 other keywords. Google normalizes each payload
+    to its own peak, so each payload is rescaled by (reference anchor total / payload anchor total),
+    where the reference is the anchor series from the first successful payload (or the `reference`
+    series from an earlier call). Values of later payloads can therefore exceed 100.
+
+    Keywords missing from a payload response (or whose whole payload failed) are re-fetched as
+    [anchor, keyword] pairs, which are rescaled the same way. Only if a pair fails too is the keyword
+    fetched on its own; those last-resort series keep Google's own 0-100 scaling, are NOT comparable
+    to the anchored ones, and are returned (and printed) as unscaled.
+
+    Args:
+        keywords (list[str]): A list of keywords to search for.
+        timeframe (str): The time range for the data.
+        anchor (str | None): The shared anchor keyword, defaults to the first keyword.
+        scheduler (FetchScheduler | None): Fetch payloads concurrently through this scheduler.
+        reference (pd.Series | None): Anchor series from an earlier batched call to rescale against.
+
+    Returns:
+        tuple: (keyword -> interest Series for every keyword that returned data,
+                the keywords whose series are NOT on the anchor's scale,
+                the reference anchor series defining the shared scale, or None if no payload succeeded)
+    """
+    anchor = anchor or keywords[0]
+    others = [k for k in keywords if k != anchor]
+    step = max_payload_size - 1     # One slot is reserved for the anchor
+
+    series = {}
+    failed = []
+    reference_total = reference.sum() if reference is not None and reference.sum() > 0 else None
+    reference_series = reference if reference_total is not None else None
+
+    # Fetch every payload first; rescaling then walks them in order, so the reference is deterministic
+    chunks = [others[i:i + step] for i in range(0, len(others), step)]
+    responses = _fetch_iot_payloads([[anchor] + chunk for chunk in chunks], timeframe, scheduler, refresh=refresh)
+
+    def payload_scale(interest_df: pd.DataFrame | None) -> float | None:
+        # Factor that puts a payload on the shared scale, or None if its anchor data is missing/all zeros
+        nonlocal reference_total, reference_series
+        if (interest_df is None or interest_df.empty or anchor not in interest_df.columns
+                or interest_df[anchor].sum() == 0):
+            return None
+        anchor_total = interest_df[anchor].sum()
+        if reference_total is None:
+            # The first successful payload defines the shared scale
+            reference_total = anchor_total
+            reference_series = interest_df[anchor].astype(float)
+        return reference_total / anchor_total
+
+    for chunk, interest_df in zip(chunks, responses):
+        kw_list = [anchor] + chunk
+
+        # Payload failed or the anchor is missing/all zeros, so the chunk can't be rescaled
+        scale = payload_scale(interest_df)
+        if scale is None:
+            print(f"Payload {kw_list} returned no usable anchor data, falling back to [anchor, keyword] pairs.\n")
+            failed.extend(chunk)
+            continue
+
+        if anchor in keywords and anchor not in series:
+            series[anchor] = (interest_df[anchor] * scale).round(2)
+
+        for keyword in chunk:
+            if keyword in interest_df.columns:
+                series[keyword] = (interest_df[keyword] * scale).round(2)
+            else:
+                failed.append(keyword)
+
+    # Re-fetch the failed keywords paired with the anchor, so they can still be rescaled
+    # (the anchor alone is a valid payload too, when no other payload returned it)
+    retry_payloads = [[anchor, keyword] for keyword in failed]
+    if anchor in keywords and anchor not in series:
+        retry_payloads.insert(0, [anchor])
+    responses = _fetch_iot_payloads(retry_payloads, timeframe, scheduler, refresh=refresh)
+
+    singles = []
+    for kw_list, interest_df in zip(retry_payloads, responses):
+        keyword = kw_list[-1]
+        scale = payload_scale(interest_df)
+        if scale is not None and keyword in interest_df.columns:
+            if anchor in keywords and anchor not in series:
+                series[anchor] = (interest_df[anchor] * scale).round(2)
+            series[keyword] = (interest_df[keyword] * scale).round(2)
+        elif keyword != anchor:
+            singles.append(keyword)
+        else:
+            print(f"Skipping '{anchor}'.\n")
+
+    # Last resort: one payload per keyword, on Google's own 0-100 scale
+    unscaled = []
+    responses = _fetch_iot_payloads([[keyword] for keyword in singles], timeframe, scheduler, refresh=refresh)
+    for keyword, interest_df in zip(singles, responses):
+        if interest_df is not None and not interest_df.empty and keyword in interest_df.columns:
+            series[keyword] = interest_df[keyword]
+            unscaled.append(keyword)
+        else:
+            print(f"Skipping '{keyword}'.\n")
+
+    if unscaled:
+        print(f"Warning: {len(unscaled)} keyword(s) could not be rescaled to anchor '{anchor}' and keep Google's "
+              f"own 0-100 scale (not comparable to the other columns): {unscaled}\n")
+
+    return series, unscaled, reference_series
+
+def get_iot(keywords: list[str], timeframe: str = 'today 12-m', batched: bool = False,
+            anchor: str | None = None, scheduler: FetchScheduler | None = None,
+            reference: pd.Series | None = None, on_result=None, refresh: bool | None = None,
+            on_reference=None) -> pd.DataFrame | None:
     """ Fetches Google Trends 'Interest Over Time' (IOT) data for a list of keywords.
-    Keywords are processed one at a time with delays to avoid rate limiting or 429 errors.
+    By default keywords are processed one at a time, paced by the shared rate limiter to avoid 429 errors.
+    With batched=True, keywords are sent up to 5 per payload and rescaled to a shared anchor keyword
+    (see _get_iot_batched), so the whole list should be passed in one call rather than pre-chunked.
+    With a scheduler, payloads are fetched concurrently on several sessions; the result is the same.
 
     Args:
         keywords (list[str]): A list of keywords to search for.
         timeframe (str): The time range for the data (e.g., '', 'today 5-y').
+        batched (bool): Send up to 5 keywords per payload instead of one.
+        anchor (str | None): Anchor keyword for batched mode, defaults to the first keyword.
+        scheduler (FetchScheduler | None): Fetch concurrently through this scheduler (default: one at a time).
+        reference (pd.Series | None): Batched mode only, the anchor series of an earlier batched call
+            (e.g. from a checkpoint) so the new values stay on the same scale.
+        on_result (callable | None): Called as on_result(keyword, series) as soon as a keyword's final
+            series is available (per payload in single-keyword mode, after rescaling in batched mode).
+        refresh (bool | None): Skip cached responses for this call (default: response_cache.refresh).
+        on_reference (callable | None): Batched mode only, called as on_reference(anchor, series) with the
+            anchor series that defines the shared scale (pass it back as `reference` to continue the scale),
+            before any on_result call. Also called when the anchor is not one of the keywords.
 
     Returns:
-        pd.DataFrame: A pandas DataFrame containing the trend daa, or None on failure
+        pd.DataFrame: A pandas DataFrame containing the trend daa, or None on failure. In batched mode,
+            attrs['unscaled_keywords'] lists the columns that could not be rescaled to the anchor.
 
     Notes:
         * keywords
@@ -94,53 +530,192 @@ def get_iot(keywords: list[str], timeframe: str = 'today 12-m') -> pd.DataFrame
             * Google property to filter by, defaults to web search
             * Other options include 'images', 'news', 'youtube', or 'froogle' (for Google Shopping)
     """
-    all_trends = pd.DataFrame()
+    if batched and keywords:
+        series, unscaled, reference_series = _get_iot_batched(keywords, timeframe, anchor, scheduler,
+                                                              reference, refresh)
+        if on_reference is not None and reference_series is not None:
+            on_reference(anchor or keywords[0], reference_series)
+        # Keep the caller's keyword order
+        all_trends = IOTAccumulator()
+        for keyword in keywords:
+            if keyword in series:
+                all_trends.add(keyword, series[keyword])
+                if on_result is not None:
+                    on_result(keyword, series[keyword])
+        iot_df = all_trends.to_frame()
+        if iot_df is not None:
+            # Columns that are NOT on the anchor's scale
+            iot_df.attrs['unscaled_keywords'] = unscaled
+        return iot_df
+
+    def report(index, interest_df):
+        # Hand each keyword's series to the caller as soon as its payload finishes
+        keyword = keywords[index]
+        if interest_df is not None and keyword in interest_df.columns:
+            on_result(keyword, interest_df[keyword])
+
+    all_trends = IOTAccumulator()
+    responses = _fetch_iot_payloads([[keyword] for keyword in keywords], timeframe, scheduler,
+                                    report if on_result is not None else None, refresh)
     
-    for keyword in keywords:
-        print(f"Fetching IOT data for: '{keyword}'...")
-        for attempt in range(max_retries):
-            try:
-                # Add polite delay before each call
-                time.sleep(random.uniform(delay_low, delay_high))
+    for keyword, interest_df in zip(keywords, responses):
+        if interest_df is None:
+            print(f"Skipping '{keyword}'.\n")
+            continue
 
-                pytrends = _get_pytrends_client()
+        # Collect the keyword's series ('isPartial' is left out), merged once at the end
+        if not interest_df.empty and keyword in interest_df.columns:
+            all_trends.add(keyword, interest_df[keyword])
+    
+    return all_trends.to_frame()
 
-                # Build the payload for the request & fetch the interest over time data
-                pytrends.build_payload(kw_list=[keyword], cat=0, timeframe=timeframe, geo='US', gprop='')
-                interest_df = pytrends.interest_over_time()
+def refresh_iot(stored_df: pd.DataFrame, overlap_periods: int = 4,
+                scheduler: FetchScheduler | None = None) -> pd.DataFrame:
+    """ Incrementally refreshes a stored IOT DataFrame by fetching only its recent tail.
 
-                if not interest_df.empty and keyword in interest_df.columns:
-                    # Initialize the DataFrame on first keyword pass
-                    if all_trends.empty:
-                        all_trends = interest_df[[keyword]]
-                    # Otherwise, merge new data in
-                    else:
-                        all_trends = all_trends.join(interest_df[[keyword]], how='outer')
-
-            except Exception as e:
-                print(f"Attempt {attempt + 1}/{max_retries} failed for '{keyword}': {e}")
-                if attempt + 1 < max_retries:
-                    print("Retrying...\n")
-                else:
-                    print(f"All retries failed for '{keyword}'. Skipping this keyword.\n")
-            else:
-                # Success: break out of the retry loop
-                print(f"Successfully fetched data for '{keyword}'.\n")
-                break
+    Requests a short window from `overlap_periods` stored points before the last one up to today.
+    Google returns finer (e.g. daily) points for short windows, so those are averaged back onto the
+    stored spacing first. Each keyword is then rescaled so its overlap matches the stored values,
+    and the new points are appended. The last stored point is always replaced, since it may have
+    been a partial ('isPartial') point when it was saved.
+
+    Args:
+        stored_df (pd.DataFrame): A previous get_iot() result (DatetimeIndex, one column per keyword).
+        overlap_periods (int): Number of stored points used to line up the new data.
+        scheduler (FetchScheduler | None): Fetch concurrently through this scheduler (default: one at a time).
+
+    Returns:
+        pd.DataFrame: The updated DataFrame. Keywords that can't be refreshed keep their stored values.
+    """
+    stored_df = stored_df.sort_index()
+    keywords = list(stored_df.columns)
+    if not keywords or len(stored_df) < 2:
+        print("Stored data is too short to refresh incrementally.\n")
+        return stored_df
+    last = stored_df.index[-1]
+
+    # Stored spacing: a fixed step (hourly/daily/weekly) or calendar months for long timeframes
+    steps = stored_df.index.to_series().diff().dropna()
+    step = steps.iloc[-1] if steps.nunique() == 1 else None
+
+    # Request window, from a few stored points before the last one up to today
+    start = stored_df.index[max(0, len(stored_df) - 1 - overlap_periods)]
+    if step is not None and step < pd.Timedelta(days=1):
+        timeframe = f"{start:%Y-%m-%dT%H} {datetime.datetime.now():%Y-%m-%dT%H}"
+    else:
+        timeframe = f"{start:%Y-%m-%d} {datetime.date.today():%Y-%m-%d}"
+    print(f"Refreshing {len(keywords)} keywords from {start:%Y-%m-%d} (timeframe '{timeframe}')...\n")
+
+    responses = _fetch_iot_payloads([[keyword] for keyword in keywords], timeframe, scheduler)
+
+    refreshed = IOTAccumulator()
+    for keyword, interest_df in zip(keywords, responses):
+        stored = stored_df[keyword].dropna()
+        if interest_df is None or interest_df.empty or keyword not in interest_df.columns:
+            print(f"No new data for '{keyword}', keeping stored values.\n")
+            refreshed.add(keyword, stored)
+            continue
+
+        # Average the new points onto the stored spacing (labelled by period start, like Google's)
+        new = interest_df[keyword].astype(float)
+        if step is not None:
+            new = new.resample(step, origin=stored_df.index[0], label='left', closed='left').mean()
         else:
-            # This block runs if the for loop completes without a `break` (i.e., all retries failed)
+            new = new.resample('MS').mean()
+        new = new.dropna()
+
+        # Line up the overlap (full stored points only) with the stored normalization
+        overlap = stored.index[(stored.index >= start) & (stored.index < last)].intersection(new.index)
+        if len(overlap) == 0 or new[overlap].sum() == 0:
+            print(f"Could not line up new data for '{keyword}' with the stored series, keeping stored values.\n")
+            refreshed.add(keyword, stored)
             continue
-    
-    # Drop the 'isPartial' column if it exists
-    if 'isPartial' in all_trends.columns:
-        all_trends.drop(columns=['isPartial'], inplace=True)
-    return all_trends if not all_trends.empty else None
+        scale = stored[overlap].sum() / new[overlap].sum()
+
+        tail = (new[new.index >= last] * scale).round(2)
+        refreshed.add(keyword, pd.concat([stored[stored.index < last], tail]))
+
+    updated_df = refreshed.to_frame()
+    updated_df.index.name = stored_df.index.name
+    return updated_df
+
+def _fetch_rq_payload(keyword: str, timeframe: str, limiter: RateLimiter | None = None,
+                      pool: TrendsClientPool | None = None, refresh: bool | None = None) -> dict | None:
+    """ Fetches the related queries for a single keyword through the shared in-memory cache.
+    Concurrent identical requests (from any thread) wait on one fetch. See _request_rq_payload for the arguments.
+    """
+    refresh = _resolve_refresh(refresh)
+    key = response_cache.make_key('rq', [keyword], timeframe, geo=rq_geo)
+    return shared_cache.get_or_fetch(key, timeframe,
+                                     lambda: _request_rq_payload(keyword, timeframe, limiter, pool, refresh),
+                                     refresh=refresh or not response_cache.enabled)
+
+def _request_rq_payload(keyword: str, timeframe: str, limiter: RateLimiter | None = None,
+                        pool: TrendsClientPool | None = None, refresh: bool | None = None) -> dict | None:
+    """ Fetches the related queries for a single keyword, with retries.
+
+    Args:
+        keyword (str): The keyword to search for.
+        timeframe (str): The time range for the data.
+        limiter (RateLimiter | None): Rate limiter to pace requests, defaults to the shared rate_limiter.
+        pool (TrendsClientPool | None): Client pool to borrow from, defaults to the shared client_pool.
+        refresh (bool | None): Skip cached responses (default: response_cache.refresh).
+
+    Returns:
+        dict: {'top'': DataFrame | None, 'rising': DataFrame | None}, or None if all retries failed.
+    """
+    limiter = limiter or rate_limiter
+    pool = pool or client_pool
+    print(f"Fetching RQ data for: '{keyword}'...")
+    # Serve from the local cache when possible (no network call, no delay)
+    cached_rq = response_cache.get_rq(keyword, timeframe, geo=rq_geo, refresh=_resolve_refresh(refresh))
+    if cached_rq is not None:
+        print(f"Loaded cached data for '{keyword}'.\n")
+        return cached_rq
+
+    for attempt in range(max_retries):
+        try:
+            # Wait for the rate limiter before each call
+            limiter.acquire()
+
+            # Borrow a kept-alive client from the pool
+            with pool.client() as pytrends:
+                # Build the payload for the request & fetch the related queries data
+                pytrends.build_payload(kw_list=[keyword], timeframe=timeframe, geo=rq_geo)
+                rq_dict = pytrends.related_queries()
+
+            # Extract the desired dataframes from the nested results.
+            top_queries = rq_dict.get(keyword, {}).get('top')
+            rising_queries = rq_dict.get(keyword, {}).get('rising')
+
+        except Exception as e:
+            # Slow down on 429s
+            if is_rate_limited(e):
+                limiter.record_throttle()
+            print(f"Attempt {attempt + 1}/{max_retries} failed for '{keyword}': {e}")
+            if attempt + 1 < max_retries:
+                print("Retrying...\n")
+            else:
+                print(f"All retries failed for '{keyword}'. Skipping this keyword.\n")
+        else:
+            # Success: cache the result and return without retrying
+            limiter.record_success()
+            print(f"Successfully fetched data for '{keyword}'.\n")
+            rq = {'top': top_queries, 'rising': rising_queries}
+            response_cache.put_rq(keyword, timeframe, rq, geo=rq_geo)
+            return rq
 
-def get_rq(keywords: list[str], timeframe: str = 'today 12-m') -> dict[str, dict]:
+    return None
+
+def get_rq(keywords: list[str], timeframe: str = 'today 12-m',
+           scheduler: FetchScheduler | None = None, on_result=None, refresh: bool | None = None) -> dict[str, dict]:
     """ Fetches Google Trends 'Related Queries' (RQ) data for a list of keywords.
     Args:
         keywords (list[str]): The keywords to search for.
         timeframe (str): The time range for the data.
+        scheduler (FetchScheduler | None): Fetch concurrently through this scheduler (default: one at a time).
+        on_result (callable | None): Called as on_result(keyword, rq) as soon as a keyword's data arrives.
+        refresh (bool | None): Skip cached responses for this call (default: response_cache.refresh).
     
     Returns:
         dict: A dictionary where keys are keywords and values are another dictionary
@@ -148,43 +723,218 @@ def get_rq(keywords: list[str], timeframe: str = 'today 12-m') -> dict[str, dict
     """
     all_rq ={}
     
-    for keyword in keywords:
-        print(f"Fetching RQ data for: '{keyword}'...")
-        for attempt in range(max_retries):
-            try:
-                # Add polite delay before each call
-                time.sleep(random.uniform(delay_low, delay_high))
-
-                pytrends = _get_pytrends_client()
-                
-                # Build the payload for the request & fetch the related queries data
-                pytrends.build_payload(kw_list=[keyword], timeframe=timeframe)
-                rq_dict = pytrends.related_queries()
+    def report(index, rq):
+        if rq is not None and on_result is not None:
+            on_result(keywords[index], rq)
 
-                # Extract the desired dataframes from the nested results.
-                top_queries = rq_dict.get(keyword, {}).get('top')
-                rising_queries = rq_dict.get(keyword, {}).get('rising')
-                all_rq[keyword] = {'top': top_queries, 'rising': rising_queries}
-
-            except Exception as e:
-                print(f"Attempt {attempt + 1}/{max_retries} failed for '{keyword}': {e}")
-                if attempt + 1 < max_retries:
-                    print("Retrying...\n")
-                else:
-                    print(f"All retries failed for '{keyword}'. Skipping this keyword.\n")
-            else:
-                # Success: break out of the retry loop
-                print(f"Successfully fetched data for '{keyword}'.\n")
-                break
-        else:
-            # This block runs if the for loop completes without a `break` (i.e., all retries failed)
-            continue
+    if scheduler is not None:
+        responses = scheduler.map(lambda keyword, limiter, pool: _fetch_rq_payload(keyword, timeframe, limiter, pool, refresh),
+                                  keywords, report)
+    else:
+        responses = []
+        for index, keyword in enumerate(keywords):
+            responses.append(_fetch_rq_payload(keyword, timeframe, refresh=refresh))
+            report(index, responses[-1])
+
+    for keyword, rq in zip(keywords, responses):
+        if rq is not None:
+            all_rq[keyword] = rq
     
     return all_rq if all_rq else None
 
+# --------------------------------------------------
+# Offline checks (python trends_tool.py --bench-merge | --check-sessions | --check-refresh), no Google requests
+# --------------------------------------------------
+def _bench_iot_merge(keyword_count: int = 1000, points: int = 260):
+    """
+    Times merging keyword_count single-keyword IOT frames (weekly points, ragged starts, with
+    pytrends' 'isPartial' column) the old way (repeated outer joins) against IOTAccumulator,
+    and checks that both give the same frame.
+    """
+    import time
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2020-01-05', periods=points, freq='W', name='date')
+    frames = {}
+    for i in range(keyword_count):
+        start = int(rng.integers(0, points // 4))
+        keyword = f"keyword {i}"
+        frames[keyword] = pd.DataFrame({keyword: rng.integers(0, 101, points - start),
+                                        'isPartial': False}, index=dates[start:])
+
+    started = time.perf_counter()
+    joined = pd.DataFrame()
+    for keyword, interest_df in frames.items():
+        if joined.empty:
+            joined = interest_df[[keyword]]
+        else:
+            joined = joined.join(interest_df[[keyword]], how='outer')
+    join_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    accumulator = IOTAccumulator()
+    for keyword, interest_df in frames.items():
+        accumulator.add(keyword, interest_df[keyword])
+    accumulated = accumulator.to_frame()
+    accumulator_seconds = time.perf_counter() - started
+
+    pd.testing.assert_frame_equal(joined, accumulated)
+    print(f"Merging {keyword_count} single-keyword frames ({points} weekly points, ragged starts):\n"
+          f"repeated join {join_seconds:.2f} s, accumulator {accumulator_seconds:.2f} s, identical result.\n")
+
+def _check_session_reuse(keywords: tuple[str, ...] = ("boho dress", "linen pants", "wool coat")):
+    """
+    Fetches IOT data for a few keywords, one after another, from a local fake Trends endpoint and
+    checks that they share one TCP connection and one cookie handshake (one pooled, kept-alive client).
+    """
+    global BASE_TRENDS_URL
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit, parse_qs
+
+    counts = {'connections': 0, 'cookies': 0, 'requests': 0}
+
+    class FakeTrends(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'   # Keep-alive, so reused connections can be counted
+
+        def setup(self):
+            super().setup()
+            counts['connections'] += 1
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body: str, content_type: str = 'application/json', cookie: str | None = None):
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            if cookie:
+                self.send_header('Set-Cookie', cookie)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _terms(self) -> int:
+            req = json.loads(parse_qs(urlsplit(self.path).query)['req'][0])
+            return len(req['comparisonItem'])
+
+        def do_GET(self):
+            counts['requests'] += 1
+            path = urlsplit(self.path).path
+            if path == '/trends/explore/':
+                counts['cookies'] += 1
+                self._reply('<html></html>', 'text/html', cookie='NID=fake; Path=/')
+            elif path == '/trends/api/widgetdata/multiline':
+                terms = self._terms()
+                timeline = [{'time': str(1704067200 + week * 604800), 'value': [week + term for term in range(terms)]}
+                            for week in range(4)]
+                self._reply(")]}',\n" + json.dumps({'default': {'timelineData': timeline}}))
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            counts['requests'] += 1
+            # The widget request is echoed back by the multiline call, so it carries the term count
+            widget = {'id': 'TIMESERIES', 'token': 'fake', 'request': {'comparisonItem': [{}] * self._terms()}}
+            self._reply(")]}'" + json.dumps({'widgets': [widget]}))
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTrends)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/trends"
+
+    # Point pytrends (and the cookie request) at the fake endpoint, without touching the disk cache
+    saved = (BASE_TRENDS_URL, TrendReq.GENERAL_URL, TrendReq.INTEREST_OVER_TIME_URL,
+             response_cache.enabled)
+    BASE_TRENDS_URL = base_url
+    TrendReq.GENERAL_URL = f"{base_url}/api/explore"
+    TrendReq.INTEREST_OVER_TIME_URL = f"{base_url}/api/widgetdata/multiline"
+    response_cache.enabled = False
+    try:
+        pool = TrendsClientPool()
+        limiter = RateLimiter(initial_interval=0.01, min_interval=0.01, jitter=0)
+        for keyword in keywords:
+            interest_df = _request_iot_payload([keyword], 'today 1-m', limiter, pool, refresh=True)
+            assert interest_df is not None and keyword in interest_df.columns, keyword
+        pool.clear()
+    finally:
+        (BASE_TRENDS_URL, TrendReq.GENERAL_URL, TrendReq.INTEREST_OVER_TIME_URL,
+         response_cache.enabled) = saved
+        server.shutdown()
+        server.server_close()
+
+    print(f"{len(keywords)} keywords: {counts['requests']} requests over {counts['connections']} TCP connection(s), "
+          f"{counts['cookies']} cookie handshake(s), {pool.created} client(s) created.\n")
+    assert counts['connections'] == 1 and counts['cookies'] == 1 and pool.created == 1, counts
+
+def _check_incremental_refresh(weeks_behind: int = 6):
+    """
+    Refreshes a weekly 'today 12-m' series saved `weeks_behind` weeks ago against a fake daily signal
+    (served like Google: weekly points for a year, daily points for short windows, each window scaled
+    to its own 0-100 peak) and compares the refreshed weeks with a full refetch put on the same scale.
+    """
+    global _request_iot_payload
+    import numpy as np
+
+    today = pd.Timestamp(datetime.date.today())
+    days = pd.date_range(today - pd.Timedelta(days=800), today, freq='D', name='date')
+    rng = np.random.default_rng(0)
+    position = np.arange(len(days))
+    signals = {
+        'seasonal': 50 + 30 * np.sin(position / 365.25 * 2 * np.pi) + rng.normal(0, 3, len(days)),
+        'growing': 20 + position / 10 + rng.normal(0, 2, len(days)),
+    }
+    daily = pd.DataFrame({k: np.clip(v, 1, None) for k, v in signals.items()}, index=days)
+    first_sunday = days[days.dayofweek == 6][0]
+
+    def google_window(keywords: list[str], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        window = daily.loc[start:end, keywords]
+        if end - start > pd.Timedelta(days=270):
+            window = window.resample('7D', origin=first_sunday, label='left', closed='left').mean()
+        return (window / window.max().max() * 100).round()
+
+    def fake_request(kw_list, timeframe, limiter=None, pool=None, refresh=None):
+        start, end = (pd.Timestamp(part) for part in timeframe.split())
+        return google_window(kw_list, start, end)
+
+    saved_request, saved_enabled = _request_iot_payload, response_cache.enabled
+    _request_iot_payload, response_cache.enabled = fake_request, False
+    try:
+        saved_on = today - pd.Timedelta(weeks=weeks_behind)
+        stored_df = pd.concat([google_window([keyword], saved_on - pd.DateOffset(months=12), saved_on)
+                               for keyword in daily.columns], axis=1)
+        updated_df = refresh_iot(stored_df)
+    finally:
+        _request_iot_payload, response_cache.enabled = saved_request, saved_enabled
+
+    # A full refetch today, put on the stored scale through the weeks both cover
+    worst = 0.0
+    for keyword in daily.columns:
+        refetch = google_window([keyword], today - pd.DateOffset(months=12), today)[keyword]
+        common = stored_df.index[:-1].intersection(refetch.index)
+        refetch = refetch * stored_df.loc[common, keyword].sum() / refetch[common].sum()
+        new_weeks = updated_df.index[updated_df.index >= stored_df.index[-1]].intersection(refetch.index)
+        difference = (updated_df.loc[new_weeks, keyword] - refetch[new_weeks]).abs().max()
+        print(f"'{keyword}': {len(new_weeks)} refreshed weeks, largest difference to a full refetch "
+              f"{difference:.2f} points.")
+        worst = max(worst, difference)
+    print("")
+    assert worst <= 1.0, worst
+
 # TEST BLOCK
 if __name__ == "__main__":
-    
+    import sys
+
+    # Offline checks replace the live tests below
+    if '--bench-merge' in sys.argv:
+        _bench_iot_merge()
+        sys.exit()
+    if '--check-sessions' in sys.argv:
+        _check_session_reuse()
+        sys.exit()
+    if '--check-refresh' in sys.argv:
+        _check_incremental_refresh()
+        sys.exit()
+
     # Test 1: Batch Interest Over Time [get_iot()]
     print("\n--- Testing Batch Interest Over Time ---\n")
     iot_keywords = ["boho dress","linen pants","wool coat"]